@@ -9,17 +9,14 @@ from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Initialize extensions
 db = SQLAlchemy()
 login_manager = LoginManager()
 migrate = Migrate()
 csrf = CSRFProtect()
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
-)
+limiter = Limiter(key_func=get_remote_address)  # default limits come from RATELIMIT_DEFAULT
 
 
 def create_app(config_name=None):
@@ -32,6 +29,17 @@ def create_app(config_name=None):
     
     app.config.from_object(f'app.config.{config_name.capitalize()}Config')
     
+    # Trust X-Forwarded-For from the reverse proxy so limits apply per client
+    if app.config.get('PROXY_FIX_X_FOR'):
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app,
+            x_for=app.config['PROXY_FIX_X_FOR'],
+            x_proto=app.config['PROXY_FIX_X_FOR']
+        )
+    
+    # Register the sqlite:// rate limit storage before the limiter reads its URI
+    from app.utils import rate_limit  # noqa: F401
+    
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
@@ -65,6 +73,15 @@ def create_app(config_name=None):
     # Register CLI commands
     register_commands(app)
     
+    # Register search index hooks
+    register_search(app)
+    
+    # Register tag counter hooks
+    register_tag_stats(app)
+    
+    # Register SQL query profiler
+    register_query_profiler(app)
+    
     # Add security headers
     add_security_headers(app)
     
@@ -110,6 +127,7 @@ def create_directories(app):
     directories = [
         app.config['UPLOAD_FOLDER'],
         os.path.join(app.config['UPLOAD_FOLDER'], 'images'),
+        os.path.join(app.config['UPLOAD_FOLDER'], 'images', 'variants'),
         os.path.join(app.config['UPLOAD_FOLDER'], 'videos'),
         os.path.join(app.config['UPLOAD_FOLDER'], 'avatars'),
         'logs'
@@ -186,8 +204,27 @@ def register_context_processors(app):
         return {'navbar_unread_count': 0}
 
 
+def register_search(app):
+    """Register full-text search index hooks on the Post model."""
+    # Importing the service attaches its SQLAlchemy event listeners
+    from app.services import search_service  # noqa: F401
+
+
+def register_tag_stats(app):
+    """Register hooks that maintain per-tag published post counts."""
+    # Importing the service attaches its SQLAlchemy session listeners
+    from app.services import tag_service  # noqa: F401
+
+
+def register_query_profiler(app):
+    """Register per-request SQL profiling when QUERY_PROFILER_ENABLED is set."""
+    from app.services.query_profiler import QueryProfiler
+    QueryProfiler.init_app(app)
+
+
 def register_commands(app):
     """Register custom CLI commands."""
+    import click
     
     @app.cli.command()
     def init_db():
@@ -201,6 +238,106 @@ def register_commands(app):
         from app.utils.seed import seed_data
         seed_data()
         print('Database seeded successfully.')
+    
+    @app.cli.command()
+    def reindex_search():
+        """Rebuild the full-text search index for posts."""
+        from app.services.search_service import SearchService
+        count = SearchService.reindex_all()
+        print(f'Search index rebuilt for {count} posts.')
+    
+    @app.cli.command()
+    def rebuild_excerpts():
+        """Recompute the plain-text excerpts shown on listing pages."""
+        from app.services.post_service import PostService
+        count = PostService.rebuild_excerpts()
+        print(f'Excerpts rebuilt for {count} posts.')
+    
+    @app.cli.command()
+    def repair_notification_counts():
+        """Recompute unread notification counters for all users."""
+        from app.services.notification_service import NotificationService
+        count = NotificationService.recount_unread()
+        print(f'Unread counters recomputed for {count} users.')
+    
+    @app.cli.command()
+    def recount_tag_stats():
+        """Recompute published post counts for all tags."""
+        from app.services.tag_service import TagService
+        count = TagService.recount()
+        print(f'Post counts recomputed for {count} tags.')
+    
+    @app.cli.command()
+    def recount_comment_stats():
+        """Recompute comment counts and last comment times for all posts."""
+        from app.services.comment_service import CommentService
+        from app.services.page_cache import PageCache
+        count = CommentService.recount_post_stats()
+        PageCache.invalidate_feeds()
+        print(f'Comment stats recomputed for {count} posts.')
+    
+    @app.cli.command()
+    @click.option('--days', default=90, show_default=True, help='Number of ended days to recompute.')
+    def rollup_stats(days):
+        """Recompute the daily activity rollup used by admin charts."""
+        from datetime import datetime, timedelta
+        from app.services.stats_service import StatsService
+        yesterday = datetime.utcnow().date() - timedelta(days=1)
+        count = StatsService.rollup(yesterday - timedelta(days=days - 1), yesterday)
+        print(f'Daily stats recomputed for {count} days.')
+    
+    @app.cli.command()
+    @click.argument('dataset', type=click.Choice(['users', 'posts', 'comments']))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default='csv', show_default=True)
+    @click.option('--search', default='', help='Same search text as the admin list page.')
+    @click.option('--status', default=None, help='Post status filter (posts only).')
+    @click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-', help='Output file (default: stdout).')
+    def export(dataset, fmt, search, status, output):
+        """Stream users, posts or comments as CSV or JSON Lines."""
+        from app.services.export_service import ExportService
+        query, columns = ExportService.build_query(dataset, search=search, status=status)
+        for chunk in ExportService.stream(query, columns, fmt):
+            output.write(chunk)
+    
+    @app.cli.command()
+    @click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+    @click.option('--default-password', default=None, help='Password for rows that leave it blank.')
+    @click.option('--dry-run', is_flag=True, help='Validate only, create nothing.')
+    @click.option('--processes', default=None, type=int, help='Password hashing processes.')
+    def import_users(csv_file, default_password, dry_run, processes):
+        """Create member accounts in bulk from a CSV file."""
+        from app.services.user_service import UserService
+        created, errors = UserService.import_users_csv(
+            csv_file, default_password=default_password, dry_run=dry_run, processes=processes
+        )
+        for error in errors:
+            print(error)
+        action = 'Would create' if dry_run else 'Created'
+        print(f'{action} {len(created)} users, {len(errors)} errors.')
+    
+    @app.cli.command()
+    @click.option('--processes', default=1, show_default=True, help='Number of worker processes.')
+    @click.option('--poll-interval', default=1.0, show_default=True, help='Seconds between polls when idle.')
+    @click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+    def worker(processes, poll_interval, burst):
+        """Run background job workers."""
+        from app.services.job_service import JobService, worker_process
+        
+        if processes <= 1:
+            processed = JobService.run_worker(poll_interval=poll_interval, burst=burst)
+            print(f'Worker finished after {processed} jobs.')
+            return
+        
+        import multiprocessing
+        config_name = os.getenv('FLASK_ENV', 'development')
+        workers = [
+            multiprocessing.Process(target=worker_process, args=(config_name, poll_interval, burst))
+            for _ in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
 
 
 def add_security_headers(app):
@@ -225,6 +362,6 @@ def add_security_headers(app):
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user for Flask-Login."""
-    from app.models.user import User
-    return User.query.get(int(user_id))
+    """Load user for Flask-Login (from the identity cache when possible)."""
+    from app.services.identity_cache import IdentityCache
+    return IdentityCache.load_user(int(user_id))
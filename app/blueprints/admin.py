@@ -1,5 +1,5 @@
 """Admin blueprint."""
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, stream_with_context, abort
 from flask_login import current_user
 from app.middleware import admin_required
 from app.models.post import Post, PostStatus
@@ -9,6 +9,8 @@ from app.models.media import Media
 from app.services.post_service import PostService
 from app.services.user_service import UserService
 from app.services.notification_service import NotificationService
+from app.services.page_cache import PageCache
+from app.services.stats_service import StatsService
 from app import db
 from datetime import date
 
@@ -19,17 +21,12 @@ admin_bp = Blueprint('admin', __name__)
 @admin_required
 def dashboard():
     """Admin dashboard."""
-    # Get statistics
-    total_members = User.query.filter_by(role=UserRole.MEMBER).count()
-    total_posts = Post.query.count()
-    published_posts = Post.query.filter_by(status=PostStatus.PUBLISHED).count()
-    pending_posts = Post.query.filter_by(status=PostStatus.PENDING_APPROVAL).count()
-    total_comments = Comment.query.count()
+    # Get statistics (one query, cached briefly)
+    stats = StatsService.get_counters()
+    activity = StatsService.get_daily_series(days=14)
     
     # Get recent pending posts
-    recent_pending = Post.query.filter_by(
-        status=PostStatus.PENDING_APPROVAL
-    ).order_by(Post.created_at.desc()).limit(5).all()
+    recent_pending = PostService.get_pending_posts(limit=5)
     
     # Get recent members
     recent_members = User.query.filter_by(
@@ -38,18 +35,87 @@ def dashboard():
     
     return render_template(
         'admin/dashboard.html',
-        stats={
-            'total_members': total_members,
-            'total_posts': total_posts,
-            'published_posts': published_posts,
-            'pending_posts': pending_posts,
-            'total_comments': total_comments
-        },
+        stats=stats,
+        activity=activity,
+        activity_max=max(
+            max(day['new_posts'], day['new_comments'], day['new_members']) for day in activity
+        ) or 1,
         recent_pending=recent_pending,
         recent_members=recent_members
     )
 
 
+@admin_bp.route('/stats/daily')
+@admin_required
+def stats_daily():
+    """Daily activity series as JSON, for charts."""
+    days = min(max(request.args.get('days', 30, type=int), 1), 365)
+    return jsonify({
+        'success': True,
+        'days': StatsService.get_daily_series(days=days)
+    })
+
+
+@admin_bp.route('/export/<dataset>')
+@admin_required
+def export(dataset):
+    """Download users, posts or comments as CSV or JSON Lines, streamed."""
+    from app.services.export_service import ExportService
+    
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ExportService.FORMATS:
+        abort(400)
+        
+    query, columns = ExportService.build_query(
+        dataset,
+        search=request.args.get('search', '').strip(),
+        status=request.args.get('status') or None
+    )
+    if query is None:
+        abort(404)
+        
+    current_app.logger.info(f'Export of {dataset} ({fmt}) by {current_user.username}')
+    response = current_app.response_class(
+        stream_with_context(ExportService.stream(query, columns, fmt)),
+        mimetype=ExportService.FORMATS[fmt]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{ExportService.filename(dataset, fmt)}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@admin_bp.route('/query-profile')
+@admin_required
+def query_profile():
+    """SQL query profile of recent requests served by this worker."""
+    from app.services.query_profiler import QueryProfiler
+    
+    report = QueryProfiler.get_report()
+    endpoints, flagged = report.snapshot() if report else ([], [])
+    
+    return render_template(
+        'admin/query_profile.html',
+        enabled=report is not None,
+        since=report.since if report else None,
+        endpoints=endpoints,
+        flagged=flagged,
+        budgets=current_app.config.get('QUERY_BUDGETS', {})
+    )
+
+
+@admin_bp.route('/query-profile/reset', methods=['POST'])
+@admin_required
+def reset_query_profile():
+    """Clear this worker's query profile."""
+    from app.services.query_profiler import QueryProfiler
+    
+    report = QueryProfiler.get_report()
+    if report:
+        report.reset()
+    flash('Đã xóa dữ liệu thống kê truy vấn', 'success')
+    return redirect(url_for('admin.query_profile'))
+
+
 @admin_bp.route('/posts/pending')
 @admin_required
 def posts_pending():
@@ -97,17 +163,22 @@ def reject_post(post_id):
 def posts_all():
     """View all posts."""
     status_filter = request.args.get('status', 'all')
+    search_query = request.args.get('search', '').strip()
+    cursor = request.args.get('cursor')
     
-    query = Post.query
-    
-    if status_filter != 'all':
-        query = query.filter_by(status=status_filter)
-    
-    posts = query.order_by(Post.created_at.desc()).all()
+    pagination, status_counts = PostService.admin_search_posts(
+        search_query,
+        status=status_filter if status_filter != 'all' else None,
+        cursor=cursor
+    )
     
     return render_template(
         'admin/posts_all.html',
-        posts=posts,
+        posts=pagination.items,
+        pagination=pagination,
+        status_counts=status_counts,
+        search_query=search_query,
+        status=status_filter if status_filter != 'all' else None,
         current_filter=status_filter
     )
 
@@ -131,18 +202,13 @@ def delete_post(post_id):
 def users():
     """User management with search."""
     search_query = request.args.get('search', '').strip()
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     
-    if search_query:
-        pagination = UserService.search_users(search_query, page=page, per_page=20)
-        users_list = pagination.items
-    else:
-        users_list = UserService.get_all_users()
-        pagination = None
+    pagination = UserService.search_users(search_query, cursor=cursor, per_page=20)
     
     return render_template(
         'admin/users.html',
-        users=users_list,
+        users=pagination.items,
         pagination=pagination,
         search_query=search_query
     )
@@ -190,6 +256,56 @@ def create_user():
     return render_template('admin/user_form.html', user=None)
 
 
+@admin_bp.route('/users/import', methods=['GET', 'POST'])
+@admin_required
+def import_users():
+    """
+    Create member accounts in bulk from an uploaded CSV file.
+    
+    Passwords are hashed serially inside the request, so the row count is
+    capped by USER_IMPORT_WEB_MAX_ROWS to finish well within the gunicorn
+    timeout; larger files go through `flask import-users`.
+    """
+    import io
+    
+    created = errors = None
+    dry_run = False
+    max_rows = current_app.config.get('USER_IMPORT_WEB_MAX_ROWS', 200)
+    
+    if request.method == 'POST':
+        csv_file = request.files.get('csv_file')
+        default_password = request.form.get('default_password', '')
+        dry_run = request.form.get('dry_run') == '1'
+        
+        if not csv_file or not csv_file.filename:
+            flash('Vui lòng chọn file CSV', 'warning')
+            return redirect(url_for('admin.import_users'))
+            
+        stream = io.TextIOWrapper(csv_file.stream, encoding='utf-8-sig', newline='')
+        created, errors = UserService.import_users_csv(
+            stream,
+            default_password=default_password or None,
+            dry_run=dry_run,
+            processes=1,
+            max_rows=max_rows
+        )
+        
+        if dry_run:
+            flash(f'Kiểm tra xong: {len(created)} tài khoản hợp lệ, {len(errors)} lỗi', 'info')
+        elif created:
+            flash(f'Đã tạo {len(created)} tài khoản', 'success')
+        else:
+            flash('Không có tài khoản nào được tạo', 'warning')
+            
+    return render_template(
+        'admin/user_import.html',
+        created=created,
+        errors=errors,
+        dry_run=dry_run,
+        max_rows=max_rows
+    )
+
+
 @admin_bp.route('/users/<int:user_id>/edit', methods=['GET', 'POST'])
 @admin_required
 def edit_user(user_id):
@@ -274,14 +390,10 @@ def comments():
     from app.services.comment_service import CommentService
     
     search_query = request.args.get('search', '').strip()
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     
-    if search_query:
-        pagination = CommentService.search_comments(search_query, page=page)
-        comments_list = pagination.items
-    else:
-        pagination = CommentService.get_all_comments(page=page)
-        comments_list = pagination.items
+    pagination = CommentService.search_comments(search_query, cursor=cursor)
+    comments_list = pagination.items
     
     return render_template(
         'admin/comments.html',
@@ -295,15 +407,15 @@ def comments():
 @admin_required
 def delete_comment(comment_id):
     """Delete comment."""
-    comment = Comment.query.get_or_404(comment_id)
+    from app.services.comment_service import CommentService
     
-    try:
-        db.session.delete(comment)
-        db.session.commit()
+    Comment.query.get_or_404(comment_id)
+    
+    success, error = CommentService.delete_comment(comment_id)
+    if success:
         flash('Bình luận đã được xóa', 'success')
-    except:
-        db.session.rollback()
-        flash('Lỗi khi xóa bình luận', 'danger')
+    else:
+        flash(error, 'danger')
     
     return redirect(url_for('admin.comments'))
 
@@ -366,9 +478,10 @@ def create_post():
                 flash(f'Lỗi embed video: {error}', 'warning')
         
         db.session.commit()
+        PageCache.invalidate_post(post.id)
         
         # Send notifications to all users about new admin post
-        NotificationService.notify_all_users(post)
+        NotificationService.queue_admin_post_notifications(post)
         
         flash(f'Bài viết "{post.title}" đã được đăng và công khai', 'success')
         return redirect(url_for('admin.dashboard'))
@@ -433,6 +546,7 @@ def edit_post(post_id):
                 flash(f'Lỗi embed video: {error}', 'warning')
         
         db.session.commit()
+        PageCache.invalidate_post(post.id)
         flash(f'Bài viết "{post.title}" đã được cập nhật', 'success')
         return redirect(url_for('admin.dashboard'))
     
@@ -451,24 +565,10 @@ def edit_post(post_id):
 @admin_required
 def promotions():
     """Belt promotion management page."""
-    from app.models.user import BELT_ORDER, UserStatus
-    
-    # Get all active members grouped by belt
-    users_by_belt = {}
-    for belt in BELT_ORDER:
-        users_by_belt[belt] = User.query.filter_by(
-            role=UserRole.MEMBER,
-            belt=belt,
-            status=UserStatus.ACTIVE
-        ).order_by(User.full_name).all()
-    
-    # Also get users without belt
-    users_by_belt['Chưa có đai'] = User.query.filter_by(
-        role=UserRole.MEMBER,
-        status=UserStatus.ACTIVE
-    ).filter(
-        db.or_(User.belt == None, User.belt == '')
-    ).order_by(User.full_name).all()
+    from app.models.user import BELT_ORDER
+    
+    # All active members grouped by belt, from a single query
+    users_by_belt = UserService.get_active_members_by_belt()
     
     return render_template(
         'admin/promotions.html',
@@ -499,7 +599,7 @@ def bulk_promote():
         flash('Dữ liệu không hợp lệ', 'danger')
         return redirect(url_for('admin.promotions'))
     
-    results, errors = UserService.bulk_promote_belt(user_ids, new_belt)
+    results, errors = UserService.bulk_promote_belt(user_ids, new_belt, promoted_by=current_user)
     
     if results:
         flash(f'Đã thăng đai cho {len(results)} võ sinh lên {new_belt}', 'success')
@@ -555,6 +655,7 @@ def create_tag():
         try:
             db.session.add(tag)
             db.session.commit()
+            PageCache.invalidate_feeds()
             flash(f'Đã tạo thẻ "{name}"', 'success')
             return redirect(url_for('admin.tags'))
         except Exception as e:
@@ -592,6 +693,7 @@ def edit_tag(tag_id):
         
         try:
             db.session.commit()
+            PageCache.invalidate_feeds()
             flash(f'Đã cập nhật thẻ "{name}"', 'success')
             return redirect(url_for('admin.tags'))
         except Exception as e:
@@ -613,6 +715,7 @@ def delete_tag(tag_id):
         # SQLAlchemy will handle removing from post_tags junction table
         db.session.delete(tag)
         db.session.commit()
+        PageCache.invalidate_feeds()
         flash(f'Đã xóa thẻ "{tag.name}"', 'success')
     except Exception as e:
         db.session.rollback()
@@ -1,5 +1,5 @@
 """Member blueprint."""
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import current_user
 from app import db
 from app.middleware import login_required
@@ -7,6 +7,8 @@ from app.models.post import Post, PostStatus
 from app.services.post_service import PostService
 from app.services.user_service import UserService
 from app.services.media_service import MediaService
+from app.services.page_cache import PageCache
+from app.services.upload_service import UploadService
 from datetime import date
 
 member_bp = Blueprint('member', __name__)
@@ -16,24 +18,10 @@ member_bp = Blueprint('member', __name__)
 @login_required
 def dashboard():
     """Member dashboard."""
-    # Get user's posts
-    user_posts = PostService.get_user_posts(current_user.id, include_all=True)
-    
-    # Count by status
-    draft_count = sum(1 for p in user_posts if p.status == PostStatus.DRAFT)
-    pending_count = sum(1 for p in user_posts if p.status == PostStatus.PENDING_APPROVAL)
-    published_count = sum(1 for p in user_posts if p.status == PostStatus.PUBLISHED)
-    rejected_count = sum(1 for p in user_posts if p.status == PostStatus.REJECTED)
-    
     return render_template(
         'member/dashboard.html',
-        posts=user_posts[:10],  # Show recent 10
-        stats={
-            'draft': draft_count,
-            'pending': pending_count,
-            'published': published_count,
-            'rejected': rejected_count
-        }
+        posts=PostService.get_recent_user_posts(current_user.id, limit=10),
+        stats=PostService.get_user_post_stats(current_user.id)
     )
 
 
@@ -222,6 +210,7 @@ def edit_post(post_id):
                     except (ValueError, TypeError):
                         continue
             db.session.commit()
+            PageCache.invalidate_post(post_id)
             # Handle action
             if action == 'submit' and post.status == PostStatus.DRAFT:
                 PostService.submit_for_approval(post_id, current_user)
@@ -309,6 +298,104 @@ def add_video(post_id):
     })
 
 
+@member_bp.route('/posts/<int:post_id>/video-uploads', methods=['POST'])
+@login_required
+def start_video_upload(post_id):
+    """Open a resumable video upload session."""
+    post = Post.query.get_or_404(post_id)
+    
+    # Check permissions
+    if not post.can_edit(current_user):
+        return jsonify({'success': False, 'message': 'Không có quyền'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    upload, error = UploadService.start(
+        current_user,
+        post,
+        filename=data.get('filename', ''),
+        mime_type=data.get('content_type', ''),
+        total_size=data.get('size'),
+        checksum=data.get('sha256')
+    )
+    
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    
+    return jsonify({
+        'success': True,
+        'upload': upload.to_dict(),
+        'chunk_size': current_app.config.get('UPLOAD_CHUNK_SIZE'),
+        'chunk_url': url_for('member.append_video_chunk', upload_id=upload.id),
+        'finalize_url': url_for('member.finalize_video_upload', upload_id=upload.id)
+    }), 201
+
+
+@member_bp.route('/video-uploads/<upload_id>', methods=['GET'])
+@login_required
+def video_upload_status(upload_id):
+    """Get upload progress, used by clients to resume."""
+    upload = UploadService.get_session(upload_id, current_user)
+    if not upload:
+        return jsonify({'success': False, 'message': 'Phiên upload không tồn tại'}), 404
+    
+    return jsonify({'success': True, 'upload': upload.to_dict()})
+
+
+@member_bp.route('/video-uploads/<upload_id>/chunks', methods=['POST'])
+@login_required
+def append_video_chunk(upload_id):
+    """Append a chunk sent as the raw request body (offset in Upload-Offset)."""
+    upload = UploadService.get_session(upload_id, current_user)
+    if not upload:
+        return jsonify({'success': False, 'message': 'Phiên upload không tồn tại'}), 404
+    
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'success': False, 'message': 'Thiếu Upload-Offset'}), 400
+    
+    upload, error = UploadService.append_chunk(
+        upload,
+        offset,
+        request.stream,
+        request.content_length,
+        checksum=request.headers.get('X-Chunk-SHA256')
+    )
+    
+    if error:
+        status = UploadService.get_session(upload_id, current_user)
+        return jsonify({
+            'success': False,
+            'message': error,
+            'upload': status.to_dict() if status else None
+        }), 400
+    
+    return jsonify({'success': True, 'upload': upload.to_dict()})
+
+
+@member_bp.route('/video-uploads/<upload_id>/finalize', methods=['POST'])
+@login_required
+def finalize_video_upload(upload_id):
+    """Verify the uploaded video and attach it to the post."""
+    upload = UploadService.get_session(upload_id, current_user)
+    if not upload:
+        return jsonify({'success': False, 'message': 'Phiên upload không tồn tại'}), 404
+    
+    # The post may have been submitted or published since the session started
+    post = Post.query.get(upload.post_id)
+    if not post or not post.can_edit(current_user):
+        return jsonify({'success': False, 'message': 'Không có quyền'}), 403
+    
+    media, error = UploadService.finalize(upload)
+    
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    
+    return jsonify({
+        'success': True,
+        'media': media.to_dict()
+    })
+
+
 @member_bp.route('/media/<int:media_id>/delete', methods=['POST'])
 @login_required
 def delete_media(media_id):
@@ -333,7 +420,7 @@ def delete_media(media_id):
 def delete_comment(comment_id):
     """Delete comment."""
     from app.models.comment import Comment
-    from app import db
+    from app.services.comment_service import CommentService
     
     comment = Comment.query.get_or_404(comment_id)
     post_id = comment.post_id
@@ -343,13 +430,11 @@ def delete_comment(comment_id):
         flash('Bạn không có quyền xóa bình luận này', 'danger')
         return redirect(url_for('public.post_detail', post_id=post_id))
     
-    try:
-        db.session.delete(comment)
-        db.session.commit()
+    success, error = CommentService.delete_comment(comment_id)
+    if success:
         flash('Bình luận đã được xóa', 'success')
-    except Exception as e:
-        db.session.rollback()
-        flash('Lỗi khi xóa bình luận', 'danger')
+    else:
+        flash(error, 'danger')
     
     return redirect(url_for('public.post_detail', post_id=post_id))
 
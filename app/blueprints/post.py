@@ -1,26 +1,38 @@
 """Post blueprint (shared routes)."""
 from flask import Blueprint, send_from_directory, current_app, abort
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from app import limiter
 import os
 
 post_bp = Blueprint('post', __name__)
 
 
 @post_bp.route('/media/<path:filename>')
+@limiter.exempt  # One page pulls many images and avatars; static files were never limited
 def serve_media(filename):
-    """Serve uploaded media files."""
-    upload_folder = current_app.config['UPLOAD_FOLDER']
+    """
+    Serve uploaded media files.
+    
+    Stored files are never rewritten under the same name, so responses are
+    marked immutable and sent with conditional and Range support. Behind the
+    bundled nginx.conf these URLs are served from disk by nginx directly.
+    """
+    upload_folder = os.path.abspath(current_app.config['UPLOAD_FOLDER'])
+    max_age = current_app.config.get('MEDIA_CACHE_MAX_AGE', 365 * 24 * 3600)
     
     # Security: prevent directory traversal
-    if '..' in filename or filename.startswith('/'):
+    if safe_join(upload_folder, filename) is None:
         abort(404)
-    
-    filepath = os.path.join(upload_folder, filename)
-    
-    if not os.path.exists(filepath):
+        
+    try:
+        response = send_from_directory(
+            upload_folder, filename, conditional=True, etag=True, max_age=max_age
+        )
+    except NotFound:
         abort(404)
-    
-    # Get directory and filename
-    directory = os.path.dirname(filepath)
-    file_basename = os.path.basename(filepath)
-    
-    return send_from_directory(directory, file_basename)
+        
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.cache_control.immutable = True
+    return response
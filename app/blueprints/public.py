@@ -1,22 +1,26 @@
 """Public blueprint."""
-from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
 from flask_login import current_user
-from app import db
+from app import limiter
 from app.models.post import Post, PostStatus
-from app.models.comment import Comment
 from app.models.tag import Tag
+from app.services.comment_service import CommentService
 from app.services.notification_service import NotificationService
+from app.services.page_cache import PageCache
 from app.services.post_service import PostService
+from app.services.search_service import SearchService
+from app.utils.helpers import markdown_to_text
 
 public_bp = Blueprint('public', __name__)
 
-
 @public_bp.route('/')
+@PageCache.cached(PageCache.GROUP_FEED)
 def index():
     """Homepage with published posts."""
     
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     tag_slug = request.args.get('tag', None)
+    sort = 'active' if request.args.get('sort') == 'active' else None
     
     # Get all tags for filter tabs
     all_tags = Tag.query.order_by(Tag.name).all()
@@ -27,32 +31,41 @@ def index():
     # Filter by tag if specified
     if tag_slug:
         tag = Tag.query.filter_by(slug=tag_slug).first_or_404()
-        pagination = PostService.get_posts_by_tag(tag.id, page=page, per_page=12)
+        pagination = PostService.get_posts_by_tag(tag.id, cursor=cursor, per_page=12)
         selected_tag = tag
         confession_posts = []
+    elif sort == 'active':
+        # Most recently commented posts across all tags
+        pagination = PostService.get_most_active_posts(cursor=cursor, per_page=12)
+        selected_tag = None
+        confession_posts = []
     else:
         # Get regular posts (exclude confession)
         if confession_tag:
-            pagination = PostService.get_published_posts_except_tag(confession_tag.id, page=page, per_page=12)
+            pagination = PostService.get_published_posts_except_tag(confession_tag.id, cursor=cursor, per_page=12)
             # Get confession posts separately
-            confession_posts = PostService.get_posts_by_tag(confession_tag.id, page=1, per_page=6).items
+            confession_posts = PostService.build_feed(
+                PostService.get_posts_by_tag(confession_tag.id, per_page=6).items
+            )
         else:
-            pagination = PostService.get_published_posts(page=page, per_page=12)
+            pagination = PostService.get_published_posts(cursor=cursor, per_page=12)
             confession_posts = []
         selected_tag = None
     
     return render_template(
         'public/index.html',
-        posts=pagination.items,
+        posts=PostService.build_feed(pagination.items),
         pagination=pagination,
         all_tags=all_tags,
         selected_tag=selected_tag,
+        sort=sort,
         confession_posts=confession_posts,
         confession_tag=confession_tag
     )
 
 
 @public_bp.route('/posts/<int:post_id>')
+@PageCache.cached('post:{post_id}')
 def post_detail(post_id):
     """Post detail page."""
     post = Post.query.get_or_404(post_id)
@@ -68,8 +81,11 @@ def post_detail(post_id):
             flash('Bạn không có quyền xem bài viết này', 'danger')
             return redirect(url_for('public.index'))
     
-    # Get comments
-    comments = post.comments.filter_by(is_approved=True).order_by(Comment.created_at.desc()).all()
+    # First page of comments; later pages come from post_comments
+    comments = CommentService.get_post_comments(
+        post.id,
+        cursor=request.args.get('comments_cursor')
+    )
     
     return render_template(
         'public/post_detail.html',
@@ -78,7 +94,31 @@ def post_detail(post_id):
     )
 
 
+@public_bp.route('/posts/<int:post_id>/comments')
+def post_comments(post_id):
+    """Next page of a post's comments as JSON, for "load more"."""
+    post = Post.query.get_or_404(post_id)
+    
+    if post.status != PostStatus.PUBLISHED and not (
+        current_user.is_authenticated
+        and (current_user.is_admin() or current_user.id == post.author_id)
+    ):
+        return jsonify({'success': False, 'message': 'Bài viết không tồn tại'}), 404
+    
+    comments = CommentService.get_post_comments(post.id, cursor=request.args.get('cursor'))
+    
+    return jsonify({
+        'success': True,
+        'comments': [comment.to_dict() for comment in comments.items],
+        'html': render_template('public/comment_items.html', comments=comments.items),
+        'next_url': url_for(
+            'public.post_comments', post_id=post.id, cursor=comments.next_cursor
+        ) if comments.has_next else None
+    })
+
+
 @public_bp.route('/posts/<int:post_id>/comment', methods=['POST'])
+@limiter.limit("10 per minute")  # Rate limit: comment spam
 def add_comment(post_id):
     """Add comment to post."""
     post = Post.query.get_or_404(post_id)
@@ -94,42 +134,38 @@ def add_comment(post_id):
         flash('Vui lòng nhập nội dung bình luận', 'warning')
         return redirect(url_for('public.post_detail', post_id=post_id))
     
-    try:
-        comment = Comment(
-            post_id=post_id,
-            content=content
-        )
-        
-        if current_user.is_authenticated:
-            comment.user_id = current_user.id
-        else:
-            # Guest comment
-            guest_name = request.form.get('guest_name', '').strip()
-            comment.guest_name = guest_name if guest_name else 'Khách'
+    guest_name = None
+    if not current_user.is_authenticated:
+        guest_name = request.form.get('guest_name', '').strip()
         
-        db.session.add(comment)
-        db.session.commit()
+    comment, error = CommentService.add_comment(
+        post, content,
+        user=current_user if current_user.is_authenticated else None,
+        guest_name=guest_name
+    )
         
-        # Notify post author about new comment
-        if current_user.is_authenticated:
-            NotificationService.notify_post_author(comment)
+    if error:
+        flash(error, 'danger')
+        return redirect(url_for('public.post_detail', post_id=post_id))
         
-        flash('Bình luận của bạn đã được thêm', 'success')
+    # Notify post author about new comment
+    if current_user.is_authenticated:
+        NotificationService.notify_post_author(comment)
         
-    except Exception as e:
-        db.session.rollback()
-        flash('Lỗi khi thêm bình luận', 'danger')
+    flash('Bình luận của bạn đã được thêm', 'success')
     
     return redirect(url_for('public.post_detail', post_id=post_id))
 
 
 @public_bp.route('/about')
+@PageCache.cached(PageCache.GROUP_PAGES)
 def about():
     """About page."""
     return render_template('public/about.html')
 
 
 @public_bp.route('/contact')
+@PageCache.cached(PageCache.GROUP_PAGES)
 def contact():
     """Contact page."""
     return render_template('public/contact.html')
@@ -147,9 +183,13 @@ def search():
     
     pagination = PostService.search_posts(keyword, page=page, per_page=12)
     
+    posts = PostService.build_feed(pagination.items)
+    for feed_post, post in zip(posts, pagination.items):
+        feed_post.snippet = SearchService.snippet(markdown_to_text(post.content), keyword)
+    
     return render_template(
         'public/search.html',
-        posts=pagination.items,
+        posts=posts,
         pagination=pagination,
         keyword=keyword
     )
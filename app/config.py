@@ -37,6 +37,13 @@ class Config:
     )
     MAX_IMAGES_PER_POST = int(os.getenv('MAX_IMAGES_PER_POST', 20))
     
+    # Resumable video uploads (sent in chunks, so not bound by MAX_CONTENT_LENGTH)
+    MAX_VIDEO_SIZE = int(os.getenv('MAX_VIDEO_SIZE', 50 * 1024 * 1024))  # 50MB default
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 2 * 1024 * 1024))  # must stay below MAX_CONTENT_LENGTH
+    UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', 24 * 3600))  # seconds
+    UPLOAD_TMP_FOLDER = os.getenv('UPLOAD_TMP_FOLDER', 'instance/uploads_tmp')  # partial uploads, never served
+    IMAGE_PROCESS_WORKERS = int(os.getenv('IMAGE_PROCESS_WORKERS', 2))  # pool size when JOB_QUEUE_ENABLED is off
+    
     # Cloudinary (Cloud Storage)
     USE_CLOUDINARY = os.getenv('USE_CLOUDINARY', 'False') == 'True'
     CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME', '')
@@ -50,10 +57,63 @@ class Config:
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     
+    # Rate limiting (sqlite:// counters are shared by all gunicorn workers on the host)
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', 'sqlite:///instance/ratelimit.db')
+    RATELIMIT_IN_MEMORY_FALLBACK_ENABLED = True  # keep limiting per worker if the file is unusable
+    RATELIMIT_DEFAULT = os.getenv('RATELIMIT_DEFAULT', '200 per day;50 per hour')  # per client, every route
+    RATELIMIT_STRATEGY = os.getenv('RATELIMIT_STRATEGY', 'sliding-window-counter')
+    RATELIMIT_HEADERS_ENABLED = True
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 0))  # number of trusted proxies in front of the app
+    
     # Pagination
     POSTS_PER_PAGE = int(os.getenv('POSTS_PER_PAGE', 12))
     COMMENTS_PER_PAGE = int(os.getenv('COMMENTS_PER_PAGE', 20))
     
+    # Background jobs (run inline unless a `flask worker` is deployed)
+    JOB_QUEUE_ENABLED = os.getenv('JOB_QUEUE_ENABLED', 'False') == 'True'
+    JOB_VISIBILITY_TIMEOUT = int(os.getenv('JOB_VISIBILITY_TIMEOUT', 300))  # seconds
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    
+    # Anonymous page cache (backend: memory = per worker, sqlite = shared file)
+    PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'True') == 'True'
+    PAGE_CACHE_BACKEND = os.getenv('PAGE_CACHE_BACKEND', 'memory')
+    PAGE_CACHE_PATH = os.getenv('PAGE_CACHE_PATH', 'instance/page_cache.db')
+    PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', 60))  # seconds
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', 1000))
+    
+    # Admin dashboard counters snapshot (per worker)
+    STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', 30))  # seconds; 0 disables
+    STATS_ROLLUP_WINDOW = int(os.getenv('STATS_ROLLUP_WINDOW', 7))  # ended days recomputed on read
+    
+    # Logged-in user snapshot cache (sqlite = shared file, so a role or status
+    # change reaches every worker at once; memory = per worker, stale up to the TTL)
+    IDENTITY_CACHE_ENABLED = os.getenv('IDENTITY_CACHE_ENABLED', 'True') == 'True'
+    IDENTITY_CACHE_BACKEND = os.getenv('IDENTITY_CACHE_BACKEND', 'sqlite')
+    IDENTITY_CACHE_PATH = os.getenv('IDENTITY_CACHE_PATH', 'instance/identity_cache.db')
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', 30))  # seconds; bounds staleness with the memory backend
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.getenv('IDENTITY_CACHE_MAX_ENTRIES', 4096))
+    
+    # Media delivery (uploaded files are never rewritten, so cache them for a year)
+    MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 365 * 24 * 3600))  # seconds
+    
+    # Bulk member import from CSV (the web form hashes serially inside the
+    # request, ~0.15s per row, so keep its cap well under the gunicorn --timeout)
+    USER_IMPORT_MAX_ROWS = int(os.getenv('USER_IMPORT_MAX_ROWS', 2000))  # flask import-users
+    USER_IMPORT_WEB_MAX_ROWS = int(os.getenv('USER_IMPORT_WEB_MAX_ROWS', 200))  # admin upload form
+    USER_IMPORT_BATCH_SIZE = int(os.getenv('USER_IMPORT_BATCH_SIZE', 500))  # rows per INSERT
+    USER_IMPORT_HASH_PROCESSES = int(os.getenv('USER_IMPORT_HASH_PROCESSES', 2))  # flask import-users; match the CPU quota
+    
+    # SQL query profiler (per-request query counts, N+1 detection; report is per worker)
+    QUERY_PROFILER_ENABLED = os.getenv('QUERY_PROFILER_ENABLED', 'False') == 'True'
+    QUERY_PROFILER_SLOW_MS = int(os.getenv('QUERY_PROFILER_SLOW_MS', 500))  # log requests slower than this
+    QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = int(os.getenv('QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 5))  # repeats of one SELECT shape
+    QUERY_PROFILER_HISTORY = int(os.getenv('QUERY_PROFILER_HISTORY', 200))  # recent requests kept for the report
+    QUERY_BUDGETS = {  # max queries per request for hot endpoints
+        'public.index': 8,
+        'public.post_detail': 8,
+        'public.post_comments': 4,
+    }
+    
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', 'logs/app.log')
@@ -63,6 +123,8 @@ class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     SQLALCHEMY_ECHO = False
+    PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'False') == 'True'
+    QUERY_PROFILER_ENABLED = os.getenv('QUERY_PROFILER_ENABLED', 'True') == 'True'
 
 
 class ProductionConfig(Config):
@@ -80,3 +142,6 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    PAGE_CACHE_ENABLED = False
+    RATELIMIT_STORAGE_URI = 'memory://'
+    IDENTITY_CACHE_BACKEND = 'memory'
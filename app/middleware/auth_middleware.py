@@ -2,7 +2,18 @@
 from functools import wraps
 from flask import flash, redirect, url_for, abort
 from flask_login import current_user
-from app.models.user import UserRole
+from app import db
+from app.models.user import User, UserRole, UserStatus
+
+
+def _is_current_admin(user):
+    """Check admin role and active status against the database.
+    
+    current_user may come from the identity cache, which can lag behind a
+    demotion or deactivation made through another worker.
+    """
+    row = db.session.query(User.role, User.status).filter(User.id == user.id).first()
+    return row is not None and row.role == UserRole.ADMIN and row.status == UserStatus.ACTIVE
 
 
 def login_required(f):
@@ -23,7 +34,7 @@ def admin_required(f):
         if not current_user.is_authenticated:
             flash('Vui lòng đăng nhập để truy cập trang này.', 'warning')
             return redirect(url_for('auth.login'))
-        if not current_user.is_admin():
+        if not current_user.is_admin() or not _is_current_admin(current_user):
             flash('Bạn không có quyền truy cập trang này.', 'danger')
             abort(403)
         return f(*args, **kwargs)
@@ -1,10 +1,14 @@
 """Database models package."""
 from app.models.user import User, UserRole, UserStatus
 from app.models.post import Post, PostStatus
-from app.models.media import Media, MediaType
+from app.models.media import Media, MediaType, MediaVariant
 from app.models.comment import Comment
 from app.models.category import Category
 from app.models.tag import Tag, post_tags
 from app.models.notification import Notification, NotificationType
+from app.models.job import Job, JobStatus
+from app.models.upload_session import UploadSession, UploadStatus
+from app.models.daily_stats import DailyStats
+from app.models.belt_promotion import BeltPromotion
 
-__all__ = ['User', 'UserRole', 'UserStatus', 'Post', 'PostStatus', 'Media', 'MediaType', 'Comment', 'Category', 'Tag', 'post_tags', 'Notification', 'NotificationType']
+__all__ = ['User', 'UserRole', 'UserStatus', 'Post', 'PostStatus', 'Media', 'MediaType', 'MediaVariant', 'Comment', 'Category', 'Tag', 'post_tags', 'Notification', 'NotificationType', 'Job', 'JobStatus', 'UploadSession', 'UploadStatus', 'DailyStats', 'BeltPromotion']
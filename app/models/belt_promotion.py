@@ -0,0 +1,22 @@
+"""Belt promotion history model."""
+from datetime import datetime
+from app import db
+
+
+class BeltPromotion(db.Model):
+    """One step in a member's rank progression."""
+    
+    __tablename__ = 'belt_promotions'
+    __table_args__ = (
+        db.Index('ix_belt_promotions_user_id_promoted_at', 'user_id', 'promoted_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    from_belt = db.Column(db.String(50), nullable=True)
+    to_belt = db.Column(db.String(50), nullable=False)
+    promoted_by_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    promoted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<BeltPromotion user={self.user_id}: {self.from_belt} -> {self.to_belt}>'
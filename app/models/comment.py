@@ -7,6 +7,10 @@ class Comment(db.Model):
     """Comment model for post discussions."""
     
     __tablename__ = 'comments'
+    __table_args__ = (
+        db.Index('ix_comments_created_at_id', 'created_at', 'id'),
+        db.Index('ix_comments_post_id_created_at_id', 'post_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), nullable=False, index=True)
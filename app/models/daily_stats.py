@@ -0,0 +1,34 @@
+"""Daily activity rollup model."""
+from datetime import datetime
+from app import db
+
+
+class DailyStats(db.Model):
+    """Per-day activity counters for admin charts (UTC days).
+    
+    Rows are only written for days that have ended; today's numbers are
+    always counted live. The last STATS_ROLLUP_WINDOW days are recomputed
+    whenever the series is read, so deletes there are reflected; older days
+    keep their counts until `flask rollup-stats` is run.
+    """
+    
+    __tablename__ = 'daily_stats'
+    
+    day = db.Column(db.Date, primary_key=True)
+    new_posts = db.Column(db.Integer, nullable=False, default=0)
+    new_comments = db.Column(db.Integer, nullable=False, default=0)
+    new_members = db.Column(db.Integer, nullable=False, default=0)
+    
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DailyStats {self.day}>'
+    
+    def to_dict(self):
+        """Convert rollup row to dictionary."""
+        return {
+            'day': self.day.isoformat(),
+            'new_posts': self.new_posts,
+            'new_comments': self.new_comments,
+            'new_members': self.new_members
+        }
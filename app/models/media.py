@@ -9,6 +9,18 @@ class MediaType:
     VIDEO = 'VIDEO'
 
 
+# Derivative widths generated for uploaded images (name -> max width in px)
+IMAGE_VARIANT_WIDTHS = {
+    'thumb': 320,
+    'card': 640,
+    'full': 1280
+}
+IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+
+# URL prefix of post.serve_media, which serves files under UPLOAD_FOLDER
+MEDIA_URL_PREFIX = '/posts/media/'
+
+
 class Media(db.Model):
     """Media model for images and videos."""
     
@@ -38,6 +50,12 @@ class Media(db.Model):
     
     # Relationships
     post = db.relationship('Post', back_populates='media')
+    variants = db.relationship(
+        'MediaVariant',
+        back_populates='media',
+        cascade='all, delete-orphan',
+        order_by='MediaVariant.width'
+    )
     
     def __repr__(self):
         return f'<Media {self.id}: {self.type}>'
@@ -58,16 +76,58 @@ class Media(db.Model):
         """Check if media is embedded."""
         return self.url is not None
     
-    def get_url(self):
-        """Get media URL."""
+    def get_url(self, size=None, image_format='jpeg'):
+        """
+        Get media URL, optionally for a resized image variant.
+        
+        Falls back to the original when the variant has not been generated
+        yet (e.g. processing is still queued).
+        """
+        if size and self.is_image():
+            if self.is_cloudinary():
+                return self._cloudinary_url(IMAGE_VARIANT_WIDTHS[size], image_format)
+            variant = self.get_variant(size, image_format)
+            if variant:
+                return variant.get_url()
+        
         # If URL field is set (Cloudinary or embedded video), return it
         if self.url:
             return self.url
         # Otherwise construct local file URL
         if self.is_uploaded():
-            return f'/static/uploads/{self.file_path}'
+            return f'{MEDIA_URL_PREFIX}{self.file_path}'
         return None
-
+    
+    def get_variant(self, size, image_format='jpeg'):
+        """Get a generated variant by size name and format, or None."""
+        for variant in self.variants:
+            if variant.size == size and variant.format == image_format:
+                return variant
+        return None
+    
+    def get_srcset(self, image_format='jpeg'):
+        """Build an <img srcset> value from the image's variants."""
+        if self.is_cloudinary():
+            return ', '.join(
+                f'{self._cloudinary_url(width, image_format)} {width}w'
+                for width in sorted(IMAGE_VARIANT_WIDTHS.values())
+            )
+        return ', '.join(
+            f'{variant.get_url()} {variant.width}w'
+            for variant in self.variants
+            if variant.format == image_format
+        )
+    
+    def is_cloudinary(self):
+        """Check if the image is hosted on Cloudinary."""
+        return bool(self.url and '/image/upload/' in self.url and 'cloudinary.com' in self.url)
+    
+    def _cloudinary_url(self, width, image_format='jpeg'):
+        """Cloudinary URL resized and re-encoded on the fly."""
+        fetch_format = 'webp' if image_format == 'webp' else 'jpg'
+        return self.url.replace(
+            '/image/upload/', f'/image/upload/w_{width},c_limit,f_{fetch_format},q_auto/', 1
+        )
     
     def get_file_size_mb(self):
         """Get file size in MB."""
@@ -93,3 +153,32 @@ class Media(db.Model):
             'is_embedded': self.is_embedded(),
             'created_at': self.created_at.isoformat()
         }
+
+
+class MediaVariant(db.Model):
+    """Resized, re-encoded derivative of an uploaded image."""
+    
+    __tablename__ = 'media_variants'
+    __table_args__ = (
+        db.UniqueConstraint('media_id', 'size', 'format', name='uq_media_variants_media_size_format'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    media_id = db.Column(db.Integer, db.ForeignKey('media.id', ondelete='CASCADE'), nullable=False, index=True)
+    size = db.Column(db.String(20), nullable=False)  # key of IMAGE_VARIANT_WIDTHS
+    format = db.Column(db.String(10), nullable=False)  # webp or jpeg
+    
+    file_path = db.Column(db.String(255), nullable=False)
+    file_size = db.Column(db.Integer, nullable=True)  # in bytes
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    
+    # Relationships
+    media = db.relationship('Media', back_populates='variants')
+    
+    def __repr__(self):
+        return f'<MediaVariant {self.media_id}: {self.size} {self.format}>'
+    
+    def get_url(self):
+        """Get variant URL."""
+        return f'{MEDIA_URL_PREFIX}{self.file_path}'
@@ -12,14 +12,35 @@ class PostStatus:
     REJECTED = 'REJECTED'
 
 
+# Characters of plain text kept in Post.excerpt (listing cards show less)
+EXCERPT_LENGTH = 300
+
+
 class Post(db.Model):
     """Post model for content management."""
     
     __tablename__ = 'posts'
+    __table_args__ = (
+        db.Index('ix_posts_status_published_at_id', 'status', 'published_at', 'id'),
+        db.Index('ix_posts_created_at_id', 'created_at', 'id'),
+        # PostgreSQL gets last_commented_at DESC NULLS LAST (migration 022)
+        db.Index('ix_posts_status_last_commented_at', 'status', 'last_commented_at', 'comment_count', 'id'),
+        db.Index('ix_posts_author_id_status_created_at', 'author_id', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
+    
+    # Rendered Markdown cache (filled on save, checked against content hash)
+    content_html = db.Column(db.Text, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True)
+    
+    # Plain-text start of the content for listing cards (set by PostService on save)
+    excerpt = db.Column(db.String(EXCERPT_LENGTH + 1), nullable=True)
+    
+    # Accent-stripped title + content, maintained by SearchService hooks
+    search_text = db.Column(db.Text, nullable=True)
     status = db.Column(db.String(20), nullable=False, default=PostStatus.DRAFT, index=True)
     
     # Category
@@ -38,6 +59,10 @@ class Post(db.Model):
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     published_at = db.Column(db.DateTime, nullable=True)
     
+    # Approved comment stats, maintained by CommentService (see `flask recount-comment-stats`)
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_commented_at = db.Column(db.DateTime, nullable=True)
+    
     # Relationships - using back_populates
     author = db.relationship('User', foreign_keys=[author_id], back_populates='posts')
     media = db.relationship('Media', back_populates='post', lazy='dynamic', cascade='all, delete-orphan')
@@ -109,10 +134,42 @@ class Post(db.Model):
         """Check if post is published."""
         return self.status == PostStatus.PUBLISHED
     
+    @staticmethod
+    def build_search_text(title, content):
+        """Build normalized text used by the full-text search index."""
+        from app.utils.helpers import normalize_search_text
+        return normalize_search_text(f'{title or ""}\n{content or ""}')
+    
+    @staticmethod
+    def build_excerpt(content):
+        """Build the plain-text excerpt shown on listing cards."""
+        from app.utils.helpers import markdown_to_text, truncate_text
+        return truncate_text(markdown_to_text(content), EXCERPT_LENGTH, suffix='…')
+    
+    def render_content(self):
+        """Render content to HTML and store it with its content hash."""
+        from app.utils.helpers import content_hash, invalidate_rendered_cache, markdown_to_html
+        
+        invalidate_rendered_cache(self.id)
+        self.content_hash = content_hash(self.content)
+        self.content_html = markdown_to_html(self.content)
+    
+    def get_content_html(self):
+        """Get rendered HTML, using the stored render if it is still current."""
+        from app.utils.helpers import content_hash, render_markdown_cached
+        
+        digest = content_hash(self.content)
+        if self.content_html is not None and self.content_hash == digest:
+            return self.content_html
+        return render_markdown_cached(self.id, self.content, digest)
+    
     def get_media_images(self):
-        """Get all image media for this post."""
-        from app.models.media import MediaType
-        return self.media.filter_by(type=MediaType.IMAGE).all()
+        """Get all image media for this post, with resized variants loaded."""
+        from sqlalchemy.orm import selectinload
+        from app.models.media import Media, MediaType
+        return self.media.filter_by(type=MediaType.IMAGE).options(
+            selectinload(Media.variants)
+        ).all()
     
     def get_media_videos(self):
         """Get all video media for this post."""
@@ -129,11 +186,12 @@ class Post(db.Model):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'published_at': self.published_at.isoformat() if self.published_at else None,
+            'comments_count': self.comment_count or 0,
+            'last_commented_at': self.last_commented_at.isoformat() if self.last_commented_at else None,
         }
         
         if include_content:
             data['content'] = self.content
             data['media'] = [m.to_dict() for m in self.media.all()]
-            data['comments_count'] = self.comments.count()
         
         return data
@@ -7,7 +7,8 @@ from app import db
 post_tags = db.Table('post_tags',
     db.Column('post_id', db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True),
     db.Column('tag_id', db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
-    db.Column('created_at', db.DateTime, default=datetime.utcnow)
+    db.Column('created_at', db.DateTime, default=datetime.utcnow),
+    db.Index('ix_post_tags_tag_id_post_id', 'tag_id', 'post_id')
 )
 
 
@@ -20,6 +21,9 @@ class Tag(db.Model):
     name = db.Column(db.String(50), unique=True, nullable=False, index=True)
     slug = db.Column(db.String(60), unique=True, nullable=False, index=True)
     color = db.Column(db.String(7), default='#6c757d')  # Hex color for badge display
+    
+    # Maintained by TagService session hooks (see `flask recount-tag-stats`)
+    published_post_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -32,8 +36,7 @@ class Tag(db.Model):
     @property
     def post_count(self):
         """Get number of published posts with this tag."""
-        from app.models.post import PostStatus
-        return self.posts.filter_by(status=PostStatus.PUBLISHED).count()
+        return self.published_post_count or 0
     
     @staticmethod
     def generate_slug(name):
@@ -0,0 +1,60 @@
+"""Resumable upload session model."""
+from datetime import datetime
+from app import db
+
+
+class UploadStatus:
+    """Upload session status constants."""
+    ACTIVE = 'ACTIVE'
+    COMPLETE = 'COMPLETE'
+
+
+class UploadSession(db.Model):
+    """In-progress chunked video upload, streamed to a .part file on disk."""
+    
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(32), primary_key=True)  # random hex, used in URLs
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), nullable=False)
+    
+    # Declared by the client at init
+    filename = db.Column(db.String(255), nullable=False)
+    mime_type = db.Column(db.String(100), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    checksum = db.Column(db.String(64), nullable=True)  # SHA-256 hex of the whole file
+    
+    # Progress
+    file_path = db.Column(db.String(255), nullable=False)  # final path, relative to UPLOAD_FOLDER
+    received_size = db.Column(db.BigInteger, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default=UploadStatus.ACTIVE)
+    media_id = db.Column(db.Integer, db.ForeignKey('media.id', ondelete='SET NULL'), nullable=True)
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<UploadSession {self.id}: {self.received_size}/{self.total_size}>'
+    
+    @property
+    def part_path(self):
+        """Path of the partial file, relative to UPLOAD_TMP_FOLDER."""
+        return f'{self.id}.part'
+    
+    def is_expired(self):
+        """Check if the session can no longer accept chunks."""
+        return self.expires_at < datetime.utcnow()
+    
+    def to_dict(self):
+        """Convert upload session to dictionary."""
+        return {
+            'id': self.id,
+            'post_id': self.post_id,
+            'filename': self.filename,
+            'total_size': self.total_size,
+            'received_size': self.received_size,
+            'status': self.status,
+            'media_id': self.media_id,
+            'expires_at': self.expires_at.isoformat()
+        }
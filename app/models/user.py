@@ -3,6 +3,7 @@ from datetime import datetime
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.models.media import MEDIA_URL_PREFIX
 from enum import Enum
 
 
@@ -43,6 +44,10 @@ class User(UserMixin, db.Model):
     """User model for authentication and member management."""
     
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+        db.Index('ix_users_role_status_belt', 'role', 'status', 'belt'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
@@ -61,6 +66,9 @@ class User(UserMixin, db.Model):
     join_date = db.Column(db.Date, nullable=True)  # Ngày gia nhập
     status = db.Column(db.String(20), nullable=False, default=UserStatus.ACTIVE)
     
+    # Denormalized counters (maintained by NotificationService)
+    unread_notification_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Timestamps
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -113,7 +121,7 @@ class User(UserMixin, db.Model):
             if self.avatar.startswith(('http://', 'https://')):
                 return self.avatar
             # Otherwise it's a local filename
-            return f'/static/uploads/avatars/{self.avatar}'
+            return f'{MEDIA_URL_PREFIX}avatars/{self.avatar}'
         return None
     
     def get_initials(self):
@@ -1,60 +1,208 @@
 """Comment service for managing comments."""
 from flask import current_app
 from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models.comment import Comment
+from app.models.post import Post
 from app.models.user import User
+from app.services.page_cache import PageCache
+from app.utils.pagination import keyset_paginate
 
 
 class CommentService:
     """Service for comment management."""
     
     @staticmethod
-    def search_comments(query, page=1, per_page=20):
+    def search_comments(query, cursor=None, per_page=20, count_cap=1000):
         """Search comments by content or author name."""
         if not query:
             # Return all comments if no query
-            return Comment.query.join(
-                Comment.post
-            ).order_by(Comment.created_at.desc()).paginate(
-                page=page, per_page=per_page, error_out=False
-            )
+            return CommentService.get_all_comments(cursor=cursor, per_page=per_page, count_cap=count_cap)
+        
+        comments = CommentService.apply_search(
+            Comment.query.outerjoin(User, User.id == Comment.user_id), query
+        )
+        
+        return keyset_paginate(
+            comments, Comment.created_at, Comment.id,
+            cursor=cursor, per_page=per_page, count_cap=count_cap
+        )
+    
+    @staticmethod
+    def apply_search(comments, query):
+        """
+        Filter a comment query by content or author name.
         
+        Args:
+            comments: Query over comments, already outer-joined to users
+            query: Search text
+            
+        Returns:
+            Filtered query
+        """
         search_pattern = f'%{query}%'
         
         # Search in comment content, user full name, or guest name
-        return Comment.query.outerjoin(
-            User, User.id == Comment.user_id
-        ).filter(
+        return comments.filter(
             or_(
                 Comment.content.ilike(search_pattern),
                 User.full_name.ilike(search_pattern),
                 Comment.guest_name.ilike(search_pattern)
             )
-        ).order_by(Comment.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
         )
     
     @staticmethod
-    def get_all_comments(page=1, per_page=20):
-        """Get all comments with pagination."""
-        return Comment.query.order_by(Comment.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+    def get_post_comments(post_id, cursor=None, per_page=None, count_cap=None):
+        """
+        Get a post's approved comments, newest first, with keyset pagination.
+        
+        Authors are eager-loaded so rendering a page issues no per-comment
+        queries.
+        
+        Args:
+            post_id: Post ID
+            cursor: Cursor from a previous page, or None for the first page
+            per_page: Page size (defaults to COMMENTS_PER_PAGE)
+            count_cap: If set, also count comments up to this many
+            
+        Returns:
+            KeysetPage of Comment
+        """
+        per_page = per_page or current_app.config.get('COMMENTS_PER_PAGE', 20)
+        query = Comment.query.options(
+            joinedload(Comment.user)
+        ).filter_by(post_id=post_id, is_approved=True)
+        
+        return keyset_paginate(
+            query, Comment.created_at, Comment.id,
+            cursor=cursor, per_page=per_page, count_cap=count_cap
         )
     
+    @staticmethod
+    def get_all_comments(cursor=None, per_page=20, count_cap=1000):
+        """Get all comments, newest first, with keyset pagination."""
+        return keyset_paginate(
+            Comment.query, Comment.created_at, Comment.id,
+            cursor=cursor, per_page=per_page, count_cap=count_cap
+        )
+    
+    @staticmethod
+    def add_comment(post, content, user=None, guest_name=None):
+        """
+        Add a comment to a post and update the post's comment stats.
+        
+        Args:
+            post: Post being commented on
+            content: Comment text
+            user: Commenting user, or None for a guest
+            guest_name: Display name for guest comments
+            
+        Returns:
+            Tuple of (Comment or None, error message)
+        """
+        try:
+            comment = Comment(post_id=post.id, content=content)
+            if user is not None:
+                comment.user_id = user.id
+            else:
+                comment.guest_name = guest_name or 'Khách'
+                
+            db.session.add(comment)
+            db.session.flush()
+            
+            if comment.is_approved:
+                Post.query.filter_by(id=post.id).update(
+                    {
+                        Post.comment_count: Post.comment_count + 1,
+                        Post.last_commented_at: comment.created_at,
+                        # Comment activity is not an edit of the post
+                        Post.updated_at: Post.updated_at
+                    },
+                    synchronize_session=False
+                )
+                
+            db.session.commit()
+            PageCache.invalidate_post(post.id)
+            return comment, None
+            
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error adding comment: {str(e)}')
+            return None, 'Lỗi khi thêm bình luận'
+    
     @staticmethod
     def delete_comment(comment_id):
-        """Delete a comment."""
+        """Delete a comment and update the post's comment stats."""
         comment = Comment.query.get(comment_id)
         if not comment:
             return False, 'Bình luận không tồn tại'
         
         try:
+            post_id = comment.post_id
+            was_approved = comment.is_approved
             db.session.delete(comment)
+            db.session.flush()
+            
+            if was_approved:
+                Post.query.filter_by(id=post_id).update(
+                    {
+                        Post.comment_count: db.case(
+                            (Post.comment_count > 0, Post.comment_count - 1), else_=0
+                        ),
+                        Post.last_commented_at: CommentService._last_commented_subquery(),
+                        Post.updated_at: Post.updated_at
+                    },
+                    synchronize_session=False
+                )
+                
             db.session.commit()
+            PageCache.invalidate_post(post_id)
             current_app.logger.info(f'Comment deleted: {comment_id}')
             return True, None
         except Exception as e:
             current_app.logger.error(f'Error deleting comment: {str(e)}')
             db.session.rollback()
             return False, 'Lỗi khi xóa bình luận'
+
+    @staticmethod
+    def recount_post_stats(post_ids=None, commit=True):
+        """
+        Recompute comment_count and last_commented_at from the comments table.
+        
+        Args:
+            post_ids: Posts to repair, or None for all posts
+            commit: Commit the transaction when done
+            
+        Returns:
+            Number of post rows updated
+        """
+        approved_count = db.session.query(db.func.count(Comment.id)).filter(
+            Comment.post_id == Post.id,
+            Comment.is_approved.is_(True)
+        ).correlate(Post).scalar_subquery()
+        
+        query = Post.query
+        if post_ids is not None:
+            query = query.filter(Post.id.in_(list(post_ids)))
+            
+        updated = query.update(
+            {
+                Post.comment_count: approved_count,
+                Post.last_commented_at: CommentService._last_commented_subquery(),
+                Post.updated_at: Post.updated_at
+            },
+            synchronize_session=False
+        )
+        
+        if commit:
+            db.session.commit()
+        return updated
+    
+    @staticmethod
+    def _last_commented_subquery():
+        """Correlated subquery for a post's latest approved comment time."""
+        return db.session.query(db.func.max(Comment.created_at)).filter(
+            Comment.post_id == Post.id,
+            Comment.is_approved.is_(True)
+        ).correlate(Post).scalar_subquery()
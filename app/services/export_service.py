@@ -0,0 +1,169 @@
+"""Streaming CSV/JSONL export of users, posts and comments."""
+import csv
+import io
+import json
+from datetime import date, datetime
+from app import db
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.user import User
+from app.services.comment_service import CommentService
+from app.services.search_service import SearchService
+from app.services.user_service import UserService
+
+
+# Rows fetched per round trip; the database cursor streams them
+EXPORT_BATCH_SIZE = 500
+
+# A leading one of these makes spreadsheet apps evaluate the cell as a formula
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _format_value(value):
+    """Convert a column value to its exported form."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_cell(value):
+    """Make a value safe to open in a spreadsheet."""
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class ExportService:
+    """Stream admin exports without loading whole tables.
+    
+    Each dataset is a column-only query filtered exactly like the matching
+    admin list, executed with yield_per so rows arrive from a server-side
+    cursor in EXPORT_BATCH_SIZE batches and are encoded as they come.
+    """
+    
+    DATASETS = ('users', 'posts', 'comments')
+    FORMATS = {
+        'csv': 'text/csv',
+        'jsonl': 'application/x-ndjson',
+    }
+    
+    @staticmethod
+    def build_query(dataset, search='', status=None):
+        """
+        Build the export query for a dataset.
+        
+        Args:
+            dataset: 'users', 'posts' or 'comments'
+            search: Same search text as the admin list page
+            status: Post status filter (posts only)
+            
+        Returns:
+            Tuple of (query, column names) or (None, error message)
+        """
+        if dataset == 'users':
+            query = UserService.apply_search(db.session.query(
+                User.id,
+                User.username,
+                User.full_name,
+                User.email,
+                User.student_id,
+                User.role,
+                User.status,
+                User.belt,
+                User.join_date,
+                User.created_at
+            ), search)
+            order = (User.created_at.desc(), User.id.desc())
+            
+        elif dataset == 'posts':
+            query = db.session.query(
+                Post.id,
+                Post.title,
+                Post.status,
+                User.username.label('author_username'),
+                User.full_name.label('author_name'),
+                Post.comment_count,
+                Post.created_at,
+                Post.published_at,
+                Post.updated_at
+            ).outerjoin(User, User.id == Post.author_id)
+            if search:
+                query = SearchService.search(query, search, ranked=False)
+            if status:
+                query = query.filter(Post.status == status)
+            order = (Post.created_at.desc(), Post.id.desc())
+            
+        elif dataset == 'comments':
+            query = db.session.query(
+                Comment.id,
+                Comment.post_id,
+                Post.title.label('post_title'),
+                db.func.coalesce(User.full_name, Comment.guest_name).label('author_name'),
+                User.username.label('author_username'),
+                Comment.content,
+                Comment.is_approved,
+                Comment.created_at
+            ).outerjoin(
+                User, User.id == Comment.user_id
+            ).join(Post, Post.id == Comment.post_id)
+            if search:
+                query = CommentService.apply_search(query, search)
+            order = (Comment.created_at.desc(), Comment.id.desc())
+            
+        else:
+            return None, 'Loại dữ liệu không hợp lệ'
+            
+        query = query.order_by(*order).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        return query, [column['name'] for column in query.column_descriptions]
+    
+    @staticmethod
+    def iter_rows(query):
+        """Yield each result row as a dict of exported values."""
+        for row in query:
+            yield {key: _format_value(value) for key, value in row._mapping.items()}
+    
+    @staticmethod
+    def stream(query, columns, fmt):
+        """
+        Encode an export query as text chunks, one per batch of rows.
+        
+        Args:
+            query: Query from build_query
+            columns: Column names from build_query
+            fmt: 'csv' or 'jsonl'
+            
+        Yields:
+            str chunks
+        """
+        buffer = io.StringIO()
+        writer = None
+        if fmt == 'csv':
+            # BOM so Excel opens the UTF-8 file with Vietnamese text intact
+            buffer.write('\ufeff')
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            
+        pending = 0
+        for row in ExportService.iter_rows(query):
+            if writer:
+                writer.writerow([_csv_cell(row[column]) for column in columns])
+            else:
+                buffer.write(json.dumps(row, ensure_ascii=False))
+                buffer.write('\n')
+                
+            pending += 1
+            if pending >= EXPORT_BATCH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+                
+        if buffer.tell():
+            yield buffer.getvalue()
+    
+    @staticmethod
+    def filename(dataset, fmt):
+        """Get the download file name for an export."""
+        return f'{dataset}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}'
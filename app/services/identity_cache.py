@@ -0,0 +1,107 @@
+"""Cache of the logged-in user's identity for Flask-Login."""
+import sqlite3
+import time
+from flask import current_app
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+from app.models.user import User
+from app.utils.cache import SQLiteCache, TTLCache
+
+
+# Columns kept in the snapshot; everything else is lazy-loaded on first access
+SNAPSHOT_FIELDS = ('id', 'username', 'role', 'status', 'full_name', 'avatar', 'belt')
+
+
+class IdentityCache:
+    """Serve current_user from a compact snapshot instead of a SELECT.
+    
+    Snapshots are keyed by a per-user version; UserService bumps the version
+    after committing changes to a user, orphaning the old snapshot. The
+    default 'sqlite' backend is shared by all workers on the host; with the
+    'memory' backend each worker only sees its own bumps, so other workers
+    may serve a stale snapshot for up to IDENTITY_CACHE_TTL seconds, which
+    is why admin_required re-reads role and status from the database.
+    """
+    
+    @staticmethod
+    def get_backend():
+        """Get the configured cache backend for the current app."""
+        backend = current_app.extensions.get('identity_cache')
+        if backend is not None:
+            return backend
+            
+        ttl = current_app.config.get('IDENTITY_CACHE_TTL', 30)
+        maxsize = current_app.config.get('IDENTITY_CACHE_MAX_ENTRIES', 4096)
+        backend = None
+        if current_app.config.get('IDENTITY_CACHE_BACKEND', 'sqlite') == 'sqlite':
+            try:
+                backend = SQLiteCache(current_app.config['IDENTITY_CACHE_PATH'], ttl=ttl, maxsize=maxsize)
+            except (sqlite3.Error, OSError) as e:
+                current_app.logger.warning(f'Identity cache file unusable, caching per worker: {str(e)}')
+        if backend is None:
+            backend = TTLCache(ttl=ttl, maxsize=maxsize)
+            
+        current_app.extensions['identity_cache'] = backend
+        return backend
+    
+    @staticmethod
+    def is_enabled():
+        """Check if identity caching is turned on."""
+        return current_app.config.get('IDENTITY_CACHE_ENABLED', False)
+    
+    @staticmethod
+    def load_user(user_id):
+        """
+        Get a user for the session, from the snapshot when possible.
+        
+        A cached snapshot is attached to the session as a persistent User
+        without querying, so relationships, mutations and commits behave as
+        usual; columns outside SNAPSHOT_FIELDS load on first access.
+        
+        Args:
+            user_id: User ID from the session cookie
+            
+        Returns:
+            User or None if the user no longer exists
+        """
+        if not IdentityCache.is_enabled():
+            return User.query.get(user_id)
+            
+        backend = IdentityCache.get_backend()
+        key = IdentityCache._snapshot_key(backend, user_id)
+        snapshot = backend.get(key)
+        
+        if snapshot is None:
+            user = User.query.get(user_id)
+            if user is not None:
+                backend.set(key, {field: getattr(user, field) for field in SNAPSHOT_FIELDS})
+            return user
+            
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
+    @staticmethod
+    def invalidate(*user_ids):
+        """Drop cached snapshots; call after committing changes to the users."""
+        if not IdentityCache.is_enabled():
+            return
+        backend = IdentityCache.get_backend()
+        for user_id in user_ids:
+            IdentityCache._bump_version(backend, user_id)
+    
+    @staticmethod
+    def _snapshot_key(backend, user_id):
+        """Build the cache key for a user's current version."""
+        version = backend.get(f'ver:{user_id}')
+        if version is None:
+            version = IdentityCache._bump_version(backend, user_id)
+        return f'user:{user_id}:{version}'
+    
+    @staticmethod
+    def _bump_version(backend, user_id):
+        """Start a new snapshot version for a user."""
+        version = time.time_ns()
+        # Outlive any snapshot stored under the previous version
+        backend.set(f'ver:{user_id}', version, ttl=backend.ttl * 10)
+        return version
@@ -0,0 +1,221 @@
+"""Database-backed background job queue."""
+import json
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.job import Job, JobStatus
+
+
+# Modules whose @JobService.task handlers must be loaded before running jobs
+TASK_MODULES = [
+    'app.services.notification_service',
+    'app.services.media_service',
+    'app.services.upload_service',
+]
+
+
+class JobService:
+    """Service for enqueueing and running background jobs.
+    
+    Jobs are rows in the `jobs` table. Workers claim them with a conditional
+    UPDATE, so any number of `flask worker` processes can share the queue
+    without an external broker. A claimed job that is not finished before its
+    visibility timeout becomes claimable again.
+    """
+    
+    _handlers = {}
+    
+    @staticmethod
+    def task(name):
+        """Register a function as the handler for jobs named `name`."""
+        def decorator(func):
+            JobService._handlers[name] = func
+            return func
+        return decorator
+    
+    @staticmethod
+    def is_async():
+        """Check if jobs are queued for workers instead of run inline."""
+        return current_app.config.get('JOB_QUEUE_ENABLED', False)
+    
+    @staticmethod
+    def enqueue(name, payload=None, delay=0, max_attempts=None):
+        """
+        Queue a job, or run it inline when the job queue is disabled.
+        
+        Args:
+            name: Registered task name
+            payload: JSON-serializable dict of keyword arguments
+            delay: Seconds to wait before the job becomes runnable
+            max_attempts: Retry limit (defaults to JOB_MAX_ATTEMPTS)
+            
+        Returns:
+            Tuple of (job or None, error message)
+        """
+        payload = payload or {}
+        encoded = json.dumps(payload)
+        
+        if not JobService.is_async():
+            JobService._load_tasks()
+            handler = JobService._handlers.get(name)
+            if handler is None:
+                return None, f'Unknown job: {name}'
+            # Savepoint, so a failing handler leaves the caller's pending work intact
+            savepoint = db.session.begin_nested()
+            try:
+                handler(**payload)
+                if savepoint.is_active:
+                    savepoint.commit()
+                return None, None
+            except Exception as e:
+                if savepoint.is_active:
+                    savepoint.rollback()
+                else:
+                    # The handler committed (which also committed the caller's
+                    # work) and failed afterwards; discard only what followed
+                    db.session.rollback()
+                current_app.logger.error(f'Inline job {name} failed: {str(e)}')
+                return None, str(e)
+                
+        try:
+            job = Job(
+                name=name,
+                payload=encoded,
+                max_attempts=max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 3),
+                run_at=datetime.utcnow() + timedelta(seconds=delay)
+            )
+            db.session.add(job)
+            db.session.commit()
+            return job, None
+            
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error enqueueing job {name}: {str(e)}')
+            return None, str(e)
+    
+    @staticmethod
+    def claim_next(worker_id):
+        """Atomically claim the next runnable job, or return None."""
+        now = datetime.utcnow()
+        timeout = current_app.config.get('JOB_VISIBILITY_TIMEOUT', 300)
+        claimable = db.or_(
+            db.and_(Job.status == JobStatus.PENDING, Job.run_at <= now),
+            db.and_(Job.status == JobStatus.RUNNING, Job.locked_until < now)
+        )
+        
+        candidate_ids = [
+            job_id for (job_id,) in db.session.query(Job.id).filter(
+                claimable
+            ).order_by(Job.run_at, Job.id).limit(10)
+        ]
+        
+        for job_id in candidate_ids:
+            claimed = Job.query.filter(Job.id == job_id, claimable).update({
+                Job.status: JobStatus.RUNNING,
+                Job.locked_by: worker_id,
+                Job.locked_until: now + timedelta(seconds=timeout),
+                Job.attempts: Job.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+            
+            if not claimed:
+                # Another worker won the race
+                continue
+                
+            job = Job.query.get(job_id)
+            if job.attempts > job.max_attempts:
+                # Worker died repeatedly while holding this job
+                JobService._finish(job, JobStatus.FAILED, 'Visibility timeout exceeded')
+                continue
+            return job
+            
+        return None
+    
+    @staticmethod
+    def execute(job):
+        """Run a claimed job and record success, retry or failure."""
+        JobService._load_tasks()
+        handler = JobService._handlers.get(job.name)
+        if handler is None:
+            JobService._finish(job, JobStatus.FAILED, f'Unknown job: {job.name}')
+            return False
+            
+        job_id = job.id
+        try:
+            handler(**json.loads(job.payload or '{}'))
+            JobService._finish(Job.query.get(job_id), JobStatus.DONE)
+            return True
+            
+        except Exception as e:
+            db.session.rollback()
+            job = Job.query.get(job_id)
+            current_app.logger.error(f'Job {job_id} ({job.name}) failed on attempt {job.attempts}: {str(e)}')
+            
+            if job.attempts >= job.max_attempts:
+                JobService._finish(job, JobStatus.FAILED, str(e))
+            else:
+                # Exponential backoff: 2s, 4s, 8s, ...
+                job.status = JobStatus.PENDING
+                job.last_error = str(e)
+                job.locked_by = None
+                job.locked_until = None
+                job.run_at = datetime.utcnow() + timedelta(seconds=2 ** job.attempts)
+                db.session.commit()
+            return False
+    
+    @staticmethod
+    def run_worker(worker_id=None, poll_interval=1.0, burst=False):
+        """
+        Claim and run jobs until stopped.
+        
+        Args:
+            worker_id: Identifier stored on claimed jobs
+            poll_interval: Seconds to sleep when the queue is empty
+            burst: Exit once the queue is empty instead of polling
+            
+        Returns:
+            Number of jobs processed
+        """
+        worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        processed = 0
+        current_app.logger.info(f'Job worker {worker_id} started')
+        
+        while True:
+            job = JobService.claim_next(worker_id)
+            if job is None:
+                if burst:
+                    return processed
+                db.session.remove()
+                time.sleep(poll_interval)
+                continue
+                
+            JobService.execute(job)
+            processed += 1
+    
+    @staticmethod
+    def _finish(job, status, error=None):
+        """Mark a job as finished with the given status."""
+        job.status = status
+        job.last_error = error
+        job.locked_until = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    
+    @staticmethod
+    def _load_tasks():
+        """Import modules that register task handlers."""
+        import importlib
+        for module in TASK_MODULES:
+            importlib.import_module(module)
+
+
+def worker_process(config_name, poll_interval, burst):
+    """Entry point for a worker subprocess started by `flask worker`."""
+    from app import create_app
+    
+    app = create_app(config_name)
+    with app.app_context():
+        JobService.run_worker(poll_interval=poll_interval, burst=burst)
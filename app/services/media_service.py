@@ -1,12 +1,21 @@
 """Media service for file upload and management."""
 import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from flask import current_app, url_for
-from PIL import Image
+from PIL import Image, features
 from werkzeug.utils import secure_filename
 from app import db
-from app.models.media import Media, MediaType
+from app.models.media import (
+    IMAGE_VARIANT_FORMATS,
+    IMAGE_VARIANT_WIDTHS,
+    Media,
+    MediaType,
+    MediaVariant
+)
+from app.services.job_service import JobService
+from app.services.page_cache import PageCache
 from app.utils.validators import (
     allowed_file,
     validate_file_size,
@@ -46,6 +55,120 @@ def _use_cloudinary():
     return False
 
 
+def _prepare_image(image, max_width=1920):
+    """Flatten transparency onto white and downscale to max_width."""
+    # Convert RGBA to RGB if necessary
+    if image.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
+        image = background
+    
+    # Resize if too large
+    if image.width > max_width:
+        ratio = max_width / image.width
+        new_height = int(image.height * ratio)
+        image = image.resize((max_width, new_height), Image.Resampling.LANCZOS)
+    
+    return image
+
+
+def _render_variants(image, output_folder, stem):
+    """
+    Encode every size/format derivative of a prepared RGB image.
+    
+    Sizes wider than the image itself are skipped rather than upscaled.
+    
+    Returns:
+        List of dicts with size, format, filename, width, height, file_size
+    """
+    formats = [f for f in IMAGE_VARIANT_FORMATS if f != 'webp' or features.check('webp')]
+    variants = []
+    previous_width = None
+    
+    for size, max_width in sorted(IMAGE_VARIANT_WIDTHS.items(), key=lambda item: item[1]):
+        width = min(max_width, image.width)
+        if width == previous_width:
+            break
+        previous_width = width
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        
+        for image_format in formats:
+            ext = 'jpg' if image_format == 'jpeg' else image_format
+            filename = f'{stem}_{size}.{ext}'
+            filepath = os.path.join(output_folder, filename)
+            if image_format == 'webp':
+                resized.save(filepath, format='WEBP', quality=80, method=4)
+            else:
+                resized.save(filepath, format='JPEG', quality=82, optimize=True, progressive=True)
+            variants.append({
+                'size': size,
+                'format': image_format,
+                'filename': filename,
+                'width': width,
+                'height': height,
+                'file_size': os.path.getsize(filepath)
+            })
+    
+    return variants
+
+
+def _encode_image(upload_folder, source_path):
+    """
+    Normalize a stored original and encode its size variants.
+    
+    Pure file work with no app or database access, so it can run in a
+    pool worker process.
+    
+    Returns:
+        Dict with file_path, width, height, file_size and variants
+    """
+    image = _prepare_image(Image.open(os.path.join(upload_folder, source_path)))
+    
+    ext = os.path.splitext(source_path)[1]
+    stem = uuid.uuid4().hex
+    file_path = f'images/{stem}{ext}'
+    filepath = os.path.join(upload_folder, file_path)
+    image.save(filepath, optimize=True, quality=85)
+    
+    variant_folder = os.path.join(upload_folder, 'images', 'variants')
+    os.makedirs(variant_folder, exist_ok=True)
+    rendered = _render_variants(image.convert('RGB'), variant_folder, stem)
+    
+    return {
+        'file_path': file_path,
+        'width': image.width,
+        'height': image.height,
+        'file_size': os.path.getsize(filepath),
+        'variants': [
+            {
+                'size': variant['size'],
+                'format': variant['format'],
+                'file_path': f'images/variants/{variant["filename"]}',
+                'file_size': variant['file_size'],
+                'width': variant['width'],
+                'height': variant['height']
+            }
+            for variant in rendered
+        ]
+    }
+
+
+_image_pool = None
+
+
+def _get_image_pool():
+    """Process pool used to encode images when the job queue is off."""
+    global _image_pool
+    if _image_pool is None:
+        _image_pool = ProcessPoolExecutor(
+            max_workers=current_app.config.get('IMAGE_PROCESS_WORKERS', 2)
+        )
+    return _image_pool
+
+
 class MediaService:
     """Service for handling media uploads and processing."""
     
@@ -79,86 +202,45 @@ class MediaService:
             ext = original_filename.rsplit('.', 1)[1].lower()
             unique_filename = f'{uuid.uuid4().hex}.{ext}'
             
-            # Save and optimize image
-            image = Image.open(file)
-            
-            # Convert RGBA to RGB if necessary
-            if image.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                image = background
+            # Local storage: keep the original, derivatives are built by a job
+            if not _use_cloudinary():
+                return MediaService._save_original_image(file, post_id, original_filename, unique_filename)
             
-            # Resize if too large (max 1920px width)
-            max_width = 1920
-            if image.width > max_width:
-                ratio = max_width / image.width
-                new_height = int(image.height * ratio)
-                image = image.resize((max_width, new_height), Image.Resampling.LANCZOS)
+            # Cloudinary resizes on the fly (see Media.get_url), so upload one size
+            image = _prepare_image(Image.open(file))
             
             # Get image dimensions
             width, height = image.size
             
-            # Check if Cloudinary is enabled
-            if _use_cloudinary():
-                # Upload to Cloudinary
-                import io
-                img_byte_arr = io.BytesIO()
-                image.save(img_byte_arr, format='JPEG', quality=85, optimize=True)
-                img_byte_arr.seek(0)
-                
-                result = cloudinary.uploader.upload(
-                    img_byte_arr,
-                    folder='posts',
-                    public_id=f'post_{post_id}_{uuid.uuid4().hex}',
-                    resource_type='image'
-                )
-                
-                # Create media record with Cloudinary URL
-                media = Media(
-                    post_id=post_id,
-                    type=MediaType.IMAGE,
-                    url=result['secure_url'],  # Cloudinary URL
-                    filename=original_filename,
-                    mime_type=file.content_type,
-                    file_size=result.get('bytes', 0),
-                    width=width,
-                    height=height
-                )
-                
-                current_app.logger.info(f'Post image uploaded to Cloudinary: {result["secure_url"]}')
+            import io
+            img_byte_arr = io.BytesIO()
+            image.save(img_byte_arr, format='JPEG', quality=85, optimize=True)
+            img_byte_arr.seek(0)
             
-            else:
-                # Local storage fallback
-                try:
-                    upload_folder = current_app.config['UPLOAD_FOLDER']
-                    image_folder = os.path.join(upload_folder, 'images')
-                    os.makedirs(image_folder, exist_ok=True)
-                    
-                    filepath = os.path.join(image_folder, unique_filename)
-                    image.save(filepath, optimize=True, quality=85)
-                    
-                    # Create media record with local path
-                    media = Media(
-                        post_id=post_id,
-                        type=MediaType.IMAGE,
-                        file_path=f'images/{unique_filename}',
-                        filename=original_filename,
-                        mime_type=file.content_type,
-                        file_size=os.path.getsize(filepath),
-                        width=width,
-                        height=height
-                    )
-                    
-                    current_app.logger.info(f'Post image saved locally: {unique_filename}')
-                
-                except PermissionError:
-                    current_app.logger.error('Cannot save post image - read-only filesystem')
-                    return None, 'Lỗi: Không thể lưu ảnh (cần cấu hình Cloudinary)'
+            result = cloudinary.uploader.upload(
+                img_byte_arr,
+                folder='posts',
+                public_id=f'post_{post_id}_{uuid.uuid4().hex}',
+                resource_type='image'
+            )
+            
+            # Create media record with Cloudinary URL
+            media = Media(
+                post_id=post_id,
+                type=MediaType.IMAGE,
+                url=result['secure_url'],  # Cloudinary URL
+                filename=original_filename,
+                mime_type=file.content_type,
+                file_size=result.get('bytes', 0),
+                width=width,
+                height=height
+            )
+            
+            current_app.logger.info(f'Post image uploaded to Cloudinary: {result["secure_url"]}')
             
             db.session.add(media)
             db.session.commit()
+            PageCache.invalidate_post(post_id)
             
             return media, None
             
@@ -166,6 +248,124 @@ class MediaService:
             current_app.logger.error(f'Error uploading image: {str(e)}')
             return None, 'Lỗi khi upload ảnh'
     
+    @staticmethod
+    def _save_original_image(file, post_id, original_filename, unique_filename):
+        """Store the upload as-is and queue media.process_image for it."""
+        # Header-only parse: validates the image without decoding pixels
+        image = Image.open(file)
+        width, height = image.size
+        file.seek(0)
+        
+        try:
+            upload_folder = current_app.config['UPLOAD_FOLDER']
+            image_folder = os.path.join(upload_folder, 'images')
+            os.makedirs(image_folder, exist_ok=True)
+            
+            filepath = os.path.join(image_folder, unique_filename)
+            file.save(filepath)
+        except PermissionError:
+            current_app.logger.error('Cannot save post image - read-only filesystem')
+            return None, 'Lỗi: Không thể lưu ảnh (cần cấu hình Cloudinary)'
+        
+        media = Media(
+            post_id=post_id,
+            type=MediaType.IMAGE,
+            file_path=f'images/{unique_filename}',
+            filename=original_filename,
+            mime_type=file.content_type,
+            file_size=os.path.getsize(filepath),
+            width=width,
+            height=height
+        )
+        db.session.add(media)
+        db.session.commit()
+        PageCache.invalidate_post(post_id)
+        
+        if JobService.is_async():
+            JobService.enqueue('media.process_image', {'media_id': media.id})
+        else:
+            MediaService._submit_image(media)
+        current_app.logger.info(f'Post image stored, processing queued: {unique_filename}')
+        
+        return media, None
+    
+    @staticmethod
+    def process_image(media_id):
+        """
+        Normalize a locally stored image and generate its size variants.
+        
+        The original is downscaled and re-encoded under a new name, then
+        thumb, card and full derivatives are written in WebP and JPEG. Files
+        are never rewritten in place because media URLs are served as
+        immutable. Safe to re-run: existing variants are replaced.
+        """
+        media = Media.query.get(media_id)
+        if not media or not media.file_path:
+            return False
+        
+        encoded = _encode_image(current_app.config['UPLOAD_FOLDER'], media.file_path)
+        return MediaService._store_encoded(media_id, media.file_path, encoded)
+    
+    @staticmethod
+    def _submit_image(media):
+        """
+        Encode an image in the process pool without blocking the request.
+        
+        Used when the job queue is off. The result is recorded from the
+        pool's callback thread inside a fresh app context.
+        """
+        app = current_app._get_current_object()
+        media_id, source_path = media.id, media.file_path
+        future = _get_image_pool().submit(_encode_image, app.config['UPLOAD_FOLDER'], source_path)
+        
+        def _done(future):
+            with app.app_context():
+                try:
+                    MediaService._store_encoded(media_id, source_path, future.result())
+                except Exception as e:
+                    db.session.rollback()
+                    current_app.logger.error(f'Error processing image {media_id}: {str(e)}')
+        
+        future.add_done_callback(_done)
+    
+    @staticmethod
+    def _store_encoded(media_id, source_path, encoded):
+        """
+        Point a media row at freshly encoded files and drop the old ones.
+        
+        If the row was deleted or re-processed while encoding, the new
+        files are discarded instead.
+        
+        Returns:
+            True if the row was updated
+        """
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        new_paths = [encoded['file_path']] + [variant['file_path'] for variant in encoded['variants']]
+        
+        media = Media.query.get(media_id)
+        if not media or media.file_path != source_path:
+            old_paths = new_paths
+            updated = False
+        else:
+            old_paths = [media.file_path] + [variant.file_path for variant in media.variants]
+            media.file_path = encoded['file_path']
+            media.width = encoded['width']
+            media.height = encoded['height']
+            media.file_size = encoded['file_size']
+            media.variants = [MediaVariant(**variant) for variant in encoded['variants']]
+            db.session.commit()
+            PageCache.invalidate_post(media.post_id)
+            updated = True
+        
+        for path in old_paths:
+            old_filepath = os.path.join(upload_folder, path)
+            if os.path.exists(old_filepath):
+                os.remove(old_filepath)
+        
+        if updated:
+            current_app.logger.info(f'Image {media_id}: {len(encoded["variants"])} variants generated')
+        return updated
+    
     @staticmethod
     def upload_video(file, post_id):
         """Upload video file (optional, for demo only)."""
@@ -185,10 +385,10 @@ class MediaService:
         file_size = file.tell()
         file.seek(0)
         
-        # Validate file size (50MB limit for videos)
-        max_video_size = 50 * 1024 * 1024  # 50MB
+        # Validate file size (resumable uploads go through UploadService instead)
+        max_video_size = current_app.config.get('MAX_VIDEO_SIZE', 50 * 1024 * 1024)
         if file_size > max_video_size:
-            return None, 'Video quá lớn (tối đa 50MB)'
+            return None, f'Video quá lớn (tối đa {max_video_size // (1024 * 1024)}MB)'
         
         try:
             # Generate unique filename
@@ -218,6 +418,7 @@ class MediaService:
             
             db.session.add(media)
             db.session.commit()
+            PageCache.invalidate_post(post_id)
             
             current_app.logger.warning(
                 f'Video uploaded to local storage. '
@@ -257,6 +458,7 @@ class MediaService:
             
             db.session.add(media)
             db.session.commit()
+            PageCache.invalidate_post(post_id)
             
             return media, None
             
@@ -272,16 +474,20 @@ class MediaService:
             return False, 'Media không tồn tại'
         
         try:
-            # Delete file if it's uploaded
+            # Delete file (and its resized variants) if it's uploaded
             if media.is_uploaded() and media.file_path:
                 upload_folder = current_app.config['UPLOAD_FOLDER']
-                filepath = os.path.join(upload_folder, media.file_path)
-                if os.path.exists(filepath):
-                    os.remove(filepath)
+                paths = [media.file_path] + [variant.file_path for variant in media.variants]
+                for path in paths:
+                    filepath = os.path.join(upload_folder, path)
+                    if os.path.exists(filepath):
+                        os.remove(filepath)
             
             # Delete database record
+            post_id = media.post_id
             db.session.delete(media)
             db.session.commit()
+            PageCache.invalidate_post(post_id)
             
             return True, None
             
@@ -407,3 +613,9 @@ class MediaService:
         except Exception as e:
             current_app.logger.error(f'Error deleting avatar: {str(e)}')
             return False, 'Lỗi khi xóa ảnh đại diện'
+
+
+@JobService.task('media.process_image')
+def _process_image_task(media_id):
+    """Background task: normalize an uploaded image and build its variants."""
+    MediaService.process_image(media_id)
@@ -1,11 +1,18 @@
 """Notification service for creating and managing notifications."""
+from datetime import datetime
 from flask import current_app, url_for
 from app import db
 from app.models.notification import Notification, NotificationType
 from app.models.user import User, UserStatus
 from app.models.post import Post
 from app.models.comment import Comment
-from typing import Optional, List, Tuple
+from app.services.job_service import JobService
+from app.utils.cache import TTLCache
+from typing import Optional, List, Tuple, Iterable
+
+
+# Short-lived per-worker cache of users.unread_notification_count
+_unread_cache = TTLCache(ttl=10, maxsize=4096)
 
 
 class NotificationService:
@@ -14,40 +21,71 @@ class NotificationService:
     MAX_NOTIFICATIONS_PER_USER = 100
     
     @staticmethod
-    def notify_all_users(post: Post) -> Tuple[int, Optional[str]]:
+    def queue_admin_post_notifications(post: Post) -> Tuple[Optional[object], Optional[str]]:
+        """
+        Queue notify_all_users for a background worker.
+        
+        The link is built here because workers have no request context.
+        
+        Args:
+            post: The newly created post
+            
+        Returns:
+            Tuple of (queued job or None, error message)
+        """
+        return JobService.enqueue('notifications.notify_all_users', {
+            'post_id': post.id,
+            'link': url_for('public.post_detail', post_id=post.id, _external=False)
+        })
+    
+    @staticmethod
+    def notify_all_users(post: Post, link: Optional[str] = None) -> Tuple[int, Optional[str]]:
         """
         Create notifications for all active users when admin posts.
         
         Args:
             post: The newly created post
+            link: Post URL (built with url_for when omitted)
             
         Returns:
             Tuple of (number of notifications created, error message)
         """
         try:
-            # Get all active users except the post author
-            users = User.query.filter(
+            # Recipients: all active users except the post author
+            recipients = (
                 User.status == UserStatus.ACTIVE,
                 User.id != post.author_id
-            ).all()
-            
-            count = 0
-            for user in users:
-                notification = Notification(
-                    user_id=user.id,
-                    type=NotificationType.ADMIN_POST,
-                    title='Bài viết mới từ Admin',
-                    message=f'Admin vừa đăng: {post.title[:100]}',
-                    link=url_for('public.post_detail', post_id=post.id, _external=False)
+            )
+            
+            # Single INSERT ... SELECT fan-out; link is built once
+            if link is None:
+                link = url_for('public.post_detail', post_id=post.id, _external=False)
+            rows = db.select(
+                User.id,
+                db.literal(NotificationType.ADMIN_POST, Notification.__table__.c.type.type),
+                db.literal('Bài viết mới từ Admin'),
+                db.literal(f'Admin vừa đăng: {post.title[:100]}'),
+                db.literal(link),
+                db.literal(False),
+                db.literal(datetime.utcnow())
+            ).where(*recipients)
+            
+            result = db.session.execute(
+                db.insert(Notification).from_select(
+                    ['user_id', 'type', 'title', 'message', 'link', 'is_read', 'created_at'],
+                    rows
                 )
-                db.session.add(notification)
-                count += 1
+            )
+            count = result.rowcount
             
-            # Cleanup old notifications per user
-            NotificationService._cleanup_old_notifications()
+            NotificationService._increment_unread(*recipients)
             
             db.session.commit()
+            _unread_cache.clear()
             current_app.logger.info(f'Created {count} notifications for admin post {post.id}')
+            
+            # Trim old notifications per user off the request path
+            JobService.enqueue('notifications.cleanup')
             return count, None
             
         except Exception as e:
@@ -84,7 +122,9 @@ class NotificationService:
                 link=url_for('public.post_detail', post_id=comment.post_id, _external=False) + f'#comment-{comment.id}'
             )
             db.session.add(notification)
+            NotificationService._increment_unread(User.id == comment.post.author_id)
             db.session.commit()
+            _unread_cache.delete(comment.post.author_id)
             
             current_app.logger.info(f'Created notification for post author {comment.post.author_id}')
             return True, None
@@ -120,16 +160,20 @@ class NotificationService:
         """
         Get count of unread notifications for a user.
         
+        Reads the denormalized counter on users, cached briefly in-process.
+        
         Args:
             user_id: User ID
             
         Returns:
             Number of unread notifications
         """
-        count = Notification.query.filter_by(
-            user_id=user_id,
-            is_read=False
-        ).count()
+        count = _unread_cache.get(user_id)
+        if count is None:
+            count = db.session.query(User.unread_notification_count).filter(
+                User.id == user_id
+            ).scalar() or 0
+            _unread_cache.set(user_id, count)
         return count
     
     @staticmethod
@@ -153,8 +197,18 @@ class NotificationService:
             if not notification:
                 return False, 'Notification not found'
             
-            notification.is_read = True
+            # Conditional update so concurrent requests decrement only once
+            updated = Notification.query.filter_by(
+                id=notification_id,
+                user_id=user_id,
+                is_read=False
+            ).update({'is_read': True}, synchronize_session=False)
+            
+            if updated:
+                NotificationService._decrement_unread(user_id, updated)
+            
             db.session.commit()
+            _unread_cache.delete(user_id)
             return True, None
             
         except Exception as e:
@@ -174,12 +228,16 @@ class NotificationService:
             Tuple of (success, error message)
         """
         try:
-            Notification.query.filter_by(
+            updated = Notification.query.filter_by(
                 user_id=user_id,
                 is_read=False
-            ).update({'is_read': True})
+            ).update({'is_read': True}, synchronize_session=False)
+            
+            if updated:
+                NotificationService._decrement_unread(user_id, updated)
             
             db.session.commit()
+            _unread_cache.delete(user_id)
             return True, None
             
         except Exception as e:
@@ -191,28 +249,100 @@ class NotificationService:
     def _cleanup_old_notifications():
         """Delete old notifications if user has too many."""
         try:
-            # For each user, keep only the latest MAX_NOTIFICATIONS_PER_USER
-            users_with_many = db.session.query(Notification.user_id).group_by(
-                Notification.user_id
-            ).having(
-                db.func.count(Notification.id) > NotificationService.MAX_NOTIFICATIONS_PER_USER
-            ).all()
-            
-            for (user_id,) in users_with_many:
-                # Get IDs of notifications to keep
-                keep_ids = db.session.query(Notification.id).filter_by(
-                    user_id=user_id
-                ).order_by(
-                    Notification.created_at.desc()
-                ).limit(NotificationService.MAX_NOTIFICATIONS_PER_USER).all()
-                
-                keep_ids = [nid[0] for nid in keep_ids]
-                
-                # Delete old ones
+            # Rank each user's notifications newest first; rows past the cap are stale
+            rank = db.func.row_number().over(
+                partition_by=Notification.user_id,
+                order_by=(Notification.created_at.desc(), Notification.id.desc())
+            )
+            ranked = db.select(
+                Notification.id,
+                Notification.user_id,
+                rank.label('rank')
+            ).subquery()
+            over_cap = ranked.c.rank > NotificationService.MAX_NOTIFICATIONS_PER_USER
+            
+            trimmed_user_ids = db.session.execute(
+                db.select(ranked.c.user_id).where(over_cap).distinct()
+            ).scalars().all()
+            
+            if trimmed_user_ids:
                 Notification.query.filter(
-                    Notification.user_id == user_id,
-                    ~Notification.id.in_(keep_ids)
+                    Notification.id.in_(db.select(ranked.c.id).where(over_cap))
                 ).delete(synchronize_session=False)
             
+            # Deleted rows may have been unread
+            if trimmed_user_ids:
+                NotificationService.recount_unread(trimmed_user_ids, commit=False)
+            
         except Exception as e:
+            db.session.rollback()
             current_app.logger.error(f'Error cleaning up notifications: {str(e)}')
+    
+    @staticmethod
+    def _increment_unread(*criteria):
+        """Atomically add one unread notification to the counter of each matching user."""
+        User.query.filter(*criteria).update(
+            {User.unread_notification_count: User.unread_notification_count + 1},
+            synchronize_session=False
+        )
+    
+    @staticmethod
+    def _decrement_unread(user_id: int, amount: int = 1):
+        """Atomically subtract from a user's unread counter, never below zero."""
+        User.query.filter(User.id == user_id).update(
+            {User.unread_notification_count: db.case(
+                (User.unread_notification_count > amount, User.unread_notification_count - amount),
+                else_=0
+            )},
+            synchronize_session=False
+        )
+    
+    @staticmethod
+    def recount_unread(user_ids: Optional[Iterable[int]] = None, commit: bool = True) -> int:
+        """
+        Recompute unread counters from the notification table.
+        
+        Args:
+            user_ids: Users to repair, or None for all users
+            commit: Commit the transaction when done
+            
+        Returns:
+            Number of user rows updated
+        """
+        unread = db.session.query(db.func.count(Notification.id)).filter(
+            Notification.user_id == User.id,
+            Notification.is_read == False
+        ).correlate(User).scalar_subquery()
+        
+        query = User.query
+        if user_ids is not None:
+            query = query.filter(User.id.in_(list(user_ids)))
+        
+        updated = query.update(
+            {User.unread_notification_count: unread},
+            synchronize_session=False
+        )
+        
+        if commit:
+            db.session.commit()
+            _unread_cache.clear()
+        return updated
+
+
+@JobService.task('notifications.notify_all_users')
+def _notify_all_users_task(post_id, link):
+    """Background task: fan out an admin post notification."""
+    post = Post.query.get(post_id)
+    if post is None:
+        return
+    count, error = NotificationService.notify_all_users(post, link=link)
+    if error:
+        raise RuntimeError(error)
+
+
+@JobService.task('notifications.cleanup')
+def _cleanup_task():
+    """Background task: enforce MAX_NOTIFICATIONS_PER_USER."""
+    NotificationService._cleanup_old_notifications()
+    db.session.commit()
+    _unread_cache.clear()
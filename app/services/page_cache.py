@@ -0,0 +1,153 @@
+"""Response cache for anonymous page views."""
+import hashlib
+import time
+from functools import wraps
+from flask import current_app, g, make_response, request, session
+from flask_login import current_user
+from flask_wtf.csrf import generate_csrf
+from app.utils.cache import SQLiteCache, TTLCache
+
+
+# Stands in for the per-session CSRF token inside cached HTML
+CSRF_PLACEHOLDER = '__page_cache_csrf_token__'
+
+
+class PageCache:
+    """Cache rendered HTML for anonymous visitors.
+    
+    Pages are grouped (e.g. 'feed', 'post:42'); every cache key embeds the
+    group's current generation, so invalidating a group just bumps its
+    generation and old entries age out via TTL. Both backends share the
+    same interface: 'memory' is per worker, 'sqlite' is shared by all
+    gunicorn workers on the host.
+    """
+    
+    GROUP_FEED = 'feed'
+    GROUP_PAGES = 'pages'
+    
+    @staticmethod
+    def get_backend():
+        """Get the configured cache backend for the current app."""
+        backend = current_app.extensions.get('page_cache')
+        if backend is not None:
+            return backend
+            
+        ttl = current_app.config.get('PAGE_CACHE_TTL', 60)
+        maxsize = current_app.config.get('PAGE_CACHE_MAX_ENTRIES', 1000)
+        if current_app.config.get('PAGE_CACHE_BACKEND', 'memory') == 'sqlite':
+            backend = SQLiteCache(current_app.config['PAGE_CACHE_PATH'], ttl=ttl, maxsize=maxsize)
+        else:
+            backend = TTLCache(ttl=ttl, maxsize=maxsize)
+            
+        current_app.extensions['page_cache'] = backend
+        return backend
+    
+    @staticmethod
+    def is_enabled():
+        """Check if page caching is turned on."""
+        return current_app.config.get('PAGE_CACHE_ENABLED', False)
+    
+    @staticmethod
+    def cached(group):
+        """
+        Cache a view's HTML for anonymous GET requests.
+        
+        Args:
+            group: Invalidation group, formatted with the view arguments
+                (e.g. 'post:{post_id}')
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not PageCache._is_cacheable_request():
+                    return view(*args, **kwargs)
+                    
+                backend = PageCache.get_backend()
+                key = PageCache._page_key(backend, group.format(**kwargs))
+                entry = backend.get(key)
+                
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    entry = PageCache._store(backend, key, response)
+                    if entry is None:
+                        return response
+                    response.set_etag(entry['etag'])
+                    response.headers['X-Page-Cache'] = 'MISS'
+                    return response.make_conditional(request)
+                    
+                if request.if_none_match.contains(entry['etag']):
+                    response = current_app.response_class(status=304)
+                else:
+                    body = entry['body'].replace(CSRF_PLACEHOLDER, generate_csrf())
+                    response = current_app.response_class(body, mimetype='text/html')
+                response.set_etag(entry['etag'])
+                response.headers['X-Page-Cache'] = 'HIT'
+                return response
+            return wrapper
+        return decorator
+    
+    @staticmethod
+    def invalidate(*groups):
+        """Drop all cached pages in the given groups."""
+        if not PageCache.is_enabled():
+            return
+        backend = PageCache.get_backend()
+        for group in groups:
+            PageCache._bump_generation(backend, group)
+    
+    @staticmethod
+    def invalidate_post(post_id):
+        """Drop a post's detail page and every feed that may list it."""
+        PageCache.invalidate(f'post:{post_id}', PageCache.GROUP_FEED)
+    
+    @staticmethod
+    def invalidate_feeds():
+        """Drop every cached feed page (e.g. after tag changes)."""
+        PageCache.invalidate(PageCache.GROUP_FEED)
+    
+    @staticmethod
+    def _is_cacheable_request():
+        """Only anonymous GETs without pending flash messages are cached."""
+        return (
+            PageCache.is_enabled()
+            and request.method in ('GET', 'HEAD')
+            and not current_user.is_authenticated
+            and '_flashes' not in session
+        )
+    
+    @staticmethod
+    def _page_key(backend, group):
+        """Build the cache key for the current URL within a group."""
+        generation = backend.get(f'gen:{group}')
+        if generation is None:
+            generation = PageCache._bump_generation(backend, group)
+        return f'page:{group}:{generation}:{request.full_path}'
+    
+    @staticmethod
+    def _bump_generation(backend, group):
+        """Start a new generation for a group, orphaning its cached pages."""
+        generation = time.time_ns()
+        # Outlive any page stored under the previous generation
+        backend.set(f'gen:{group}', generation, ttl=backend.ttl * 10)
+        return generation
+    
+    @staticmethod
+    def _store(backend, key, response):
+        """Cache a successful HTML response. Returns the entry or None."""
+        if (response.status_code != 200
+                or response.mimetype != 'text/html'
+                or response.direct_passthrough
+                or '_flashes' in session):
+            return None
+            
+        body = response.get_data(as_text=True)
+        token = g.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'))
+        if token:
+            body = body.replace(token, CSRF_PLACEHOLDER)
+            
+        entry = {
+            'body': body,
+            'etag': hashlib.sha1(body.encode('utf-8')).hexdigest()
+        }
+        backend.set(key, entry)
+        return entry
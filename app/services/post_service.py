@@ -1,9 +1,52 @@
 """Post service for content management."""
 from datetime import datetime
 from flask import current_app
+from sqlalchemy.orm import defer
 from app import db
 from app.models.post import Post, PostStatus
 from app.models.user import UserRole
+from app.services.page_cache import PageCache
+from app.utils.pagination import keyset_paginate
+
+
+class FeedPost:
+    """Read-only, pre-hydrated view of a post for listing cards."""
+    
+    def __init__(self, post, author=None, cover_image=None, tags=None):
+        self.id = post.id
+        self.title = post.title
+        self.excerpt = post.excerpt or ''
+        self.status = post.status
+        self.created_at = post.created_at
+        self.published_at = post.published_at
+        self.comment_count = post.comment_count or 0
+        self.last_commented_at = post.last_commented_at
+        self.author = author
+        self.cover_image = cover_image
+        self.tags = tags or []
+        self.snippet = None
+    
+    def __repr__(self):
+        return f'<FeedPost {self.id}: {self.title}>'
+    
+    @property
+    def cover_url(self):
+        """Get URL of the first image at card size, or None."""
+        return self.cover_image.get_url('card') if self.cover_image else None
+    
+    @property
+    def cover_srcset(self):
+        """Get JPEG srcset of the first image ('' if no variants yet)."""
+        return self.cover_image.get_srcset() if self.cover_image else ''
+    
+    @property
+    def cover_webp_srcset(self):
+        """Get WebP srcset of the first image ('' if no variants yet)."""
+        return self.cover_image.get_srcset('webp') if self.cover_image else ''
+    
+    def is_admin_post(self):
+        """Check if this post was created by an admin."""
+        return bool(self.author and self.author.is_admin())
 
 
 class PostService:
@@ -19,6 +62,8 @@ class PostService:
                 status=status,
                 author_id=author.id
             )
+            post.render_content()
+            post.excerpt = Post.build_excerpt(content)
             
             # Admin can publish directly
             if author.is_admin() and status == PostStatus.PUBLISHED:
@@ -27,6 +72,9 @@ class PostService:
             db.session.add(post)
             db.session.commit()
             
+            if post.status == PostStatus.PUBLISHED:
+                PageCache.invalidate_post(post.id)
+            
             return post, None
             
         except Exception as e:
@@ -48,12 +96,15 @@ class PostService:
         try:
             if title:
                 post.title = title
-            if content:
+            if content and content != post.content:
                 post.content = content
+                post.render_content()
+                post.excerpt = Post.build_excerpt(content)
             
             post.updated_at = datetime.utcnow()
             
             db.session.commit()
+            PageCache.invalidate_post(post.id)
             
             return post, None
             
@@ -76,6 +127,7 @@ class PostService:
         try:
             db.session.delete(post)
             db.session.commit()
+            PageCache.invalidate_post(post_id)
             
             return True, None
             
@@ -127,6 +179,7 @@ class PostService:
         try:
             post.approve(reviewer)
             db.session.commit()
+            PageCache.invalidate_post(post_id)
             
             current_app.logger.info(f'Post {post_id} approved by admin {reviewer.id}')
             
@@ -164,31 +217,149 @@ class PostService:
             return None, 'Lỗi khi từ chối bài viết'
     
     @staticmethod
-    def get_published_posts(page=1, per_page=12):
-        """Get published posts with pagination."""
-        return Post.query.filter_by(
-            status=PostStatus.PUBLISHED
-        ).order_by(
-            Post.published_at.desc()
-        ).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
+    def rebuild_excerpts(batch_size=200):
+        """
+        Recompute the stored excerpt of every post.
+        
+        Args:
+            batch_size: Posts loaded and committed per batch
+            
+        Returns:
+            Number of posts updated
+        """
+        table = Post.__table__
+        update = table.update().where(
+            table.c.id == db.bindparam('post_id')
+        ).values(
+            excerpt=db.bindparam('new_excerpt'),
+            # Not an edit: keep the post's modification time
+            updated_at=table.c.updated_at
+        )
+        
+        count = 0
+        last_id = 0
+        while True:
+            rows = db.session.query(Post.id, Post.content).filter(
+                Post.id > last_id
+            ).order_by(Post.id).limit(batch_size).all()
+            if not rows:
+                break
+                
+            db.session.execute(update, [
+                {'post_id': post_id, 'new_excerpt': Post.build_excerpt(content)}
+                for post_id, content in rows
+            ])
+            db.session.commit()
+            
+            count += len(rows)
+            last_id = rows[-1].id
+            
+        PageCache.invalidate_feeds()
+        return count
+    
+    @staticmethod
+    def _listing_query():
+        """Post query for listings: the large text columns stay unloaded."""
+        return Post.query.options(
+            defer(Post.content),
+            defer(Post.content_html),
+            defer(Post.search_text)
+        )
+    
+    @staticmethod
+    def build_feed(posts):
+        """
+        Hydrate a page of posts into FeedPost views.
+        
+        Authors, first images (with their variants) and tags are fetched
+        with one IN-list query each, so the cost stays constant regardless
+        of page size.
+        """
+        from sqlalchemy.orm import selectinload
+        from app.models.media import Media, MediaType
+        from app.models.tag import Tag, post_tags
+        from app.models.user import User
+        
+        posts = list(posts)
+        if not posts:
+            return []
+        
+        post_ids = [p.id for p in posts]
+        author_ids = {p.author_id for p in posts}
+        
+        authors = {
+            u.id: u for u in User.query.filter(User.id.in_(author_ids)).all()
+        }
+        
+        first_image_ids = db.session.query(
+            db.func.min(Media.id)
+        ).filter(
+            Media.post_id.in_(post_ids),
+            Media.type == MediaType.IMAGE
+        ).group_by(Media.post_id)
+        covers = {
+            m.post_id: m for m in Media.query.options(
+                selectinload(Media.variants)
+            ).filter(Media.id.in_(first_image_ids)).all()
+        }
+        
+        tags_by_post = {}
+        tag_rows = db.session.query(post_tags.c.post_id, Tag).join(
+            Tag, Tag.id == post_tags.c.tag_id
+        ).filter(
+            post_tags.c.post_id.in_(post_ids)
+        ).order_by(Tag.name).all()
+        for post_id, tag in tag_rows:
+            tags_by_post.setdefault(post_id, []).append(tag)
+        
+        return [
+            FeedPost(
+                post,
+                author=authors.get(post.author_id),
+                cover_image=covers.get(post.id),
+                tags=tags_by_post.get(post.id)
+            )
+            for post in posts
+        ]
+    
+    @staticmethod
+    def get_published_posts(cursor=None, per_page=12):
+        """Get published posts, newest first, with keyset pagination."""
+        query = PostService._listing_query().filter_by(status=PostStatus.PUBLISHED)
+        
+        return keyset_paginate(query, Post.published_at, Post.id, cursor=cursor, per_page=per_page)
+    
+    @staticmethod
+    def get_most_active_posts(cursor=None, per_page=12):
+        """
+        Get published posts, most recently commented first, with keyset pagination.
+        
+        Ties on the last comment time go to the post with more comments;
+        posts nobody has commented on come last, newest id first.
+        """
+        query = PostService._listing_query().filter_by(status=PostStatus.PUBLISHED)
+        
+        return keyset_paginate(
+            query, (Post.last_commented_at, Post.comment_count), Post.id,
+            cursor=cursor, per_page=per_page, nulls_last=True
         )
     
     @staticmethod
-    def get_pending_posts():
-        """Get posts pending approval."""
-        return Post.query.filter_by(
+    def get_pending_posts(limit=None):
+        """Get posts pending approval, newest first (optionally only the first limit)."""
+        query = PostService._listing_query().filter_by(
             status=PostStatus.PENDING_APPROVAL
         ).order_by(
             Post.created_at.desc()
-        ).all()
+        )
+        if limit:
+            query = query.limit(limit)
+        return query.all()
     
     @staticmethod
     def get_user_posts(user_id, include_all=False):
         """Get posts by user."""
-        query = Post.query.filter_by(author_id=user_id)
+        query = PostService._listing_query().filter_by(author_id=user_id)
         
         if not include_all:
             # Exclude rejected posts for non-admin users
@@ -197,69 +368,135 @@ class PostService:
         return query.order_by(Post.created_at.desc()).all()
     
     @staticmethod
-    def search_posts(keyword, page=1, per_page=12):
-        """Search published posts by keyword."""
-        return Post.query.filter(
-            Post.status == PostStatus.PUBLISHED,
-            db.or_(
-                Post.title.ilike(f'%{keyword}%'),
-                Post.content.ilike(f'%{keyword}%')
-            )
+    def get_user_post_stats(user_id):
+        """
+        Count a user's posts by status with one GROUP BY query.
+        
+        Args:
+            user_id: Author's user ID
+            
+        Returns:
+            Dict with draft, pending, approved, published, rejected and total counts
+        """
+        rows = db.session.query(
+            Post.status, db.func.count(Post.id)
+        ).filter(
+            Post.author_id == user_id
+        ).group_by(Post.status).all()
+        counts = dict(rows)
+        
+        stats = {
+            'draft': counts.get(PostStatus.DRAFT, 0),
+            'pending': counts.get(PostStatus.PENDING_APPROVAL, 0),
+            'approved': counts.get(PostStatus.APPROVED, 0),
+            'published': counts.get(PostStatus.PUBLISHED, 0),
+            'rejected': counts.get(PostStatus.REJECTED, 0),
+        }
+        stats['total'] = sum(counts.values())
+        return stats
+    
+    @staticmethod
+    def get_recent_user_posts(user_id, limit=10):
+        """Get a user's newest posts, without loading their content."""
+        from sqlalchemy.orm import load_only
+        
+        return Post.query.options(
+            load_only(Post.id, Post.title, Post.status, Post.created_at, Post.author_id)
+        ).filter_by(
+            author_id=user_id
         ).order_by(
-            Post.published_at.desc()
-        ).paginate(
+            Post.created_at.desc(), Post.id.desc()
+        ).limit(limit).all()
+    
+    @staticmethod
+    def search_posts(keyword, page=1, per_page=12):
+        """Search published posts by keyword, ranked by relevance."""
+        from app.services.search_service import SearchService
+        
+        # Content stays loaded: result snippets are cut around the match
+        query = Post.query.options(
+            defer(Post.content_html),
+            defer(Post.search_text)
+        ).filter(Post.status == PostStatus.PUBLISHED)
+        
+        return SearchService.search(query, keyword).paginate(
             page=page,
             per_page=per_page,
             error_out=False
         )
     
     @staticmethod
-    def admin_search_posts(query, page=1, per_page=20):
-        """Search all posts including drafts (admin only)."""
-        from sqlalchemy import or_
+    def admin_search_posts(query, status=None, cursor=None, per_page=20):
+        """
+        List posts of every status for the admin, newest first.
         
-        if not query:
-            return Post.query.order_by(Post.created_at.desc()).paginate(
-                page=page, per_page=per_page, error_out=False
-            )
+        Only the listed columns are selected (no content, one join for the
+        author name), and filtering, search and paging all run in SQL.
         
-        search_pattern = f'%{query}%'
-        return Post.query.filter(
-            or_(
-                Post.title.ilike(search_pattern),
-                Post.content.ilike(search_pattern)
-            )
-        ).order_by(Post.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+        Args:
+            query: Search keyword, or '' for no search
+            status: Only this status, or None for all
+            cursor: Cursor from a previous page, or None for the first page
+            per_page: Page size
+            
+        Returns:
+            Tuple of (KeysetPage of rows with id, title, status, created_at,
+            updated_at, published_at, author_id and author_name; facet dict
+            of counts per status plus 'total' for the search, ignoring status)
+        """
+        from app.models.user import User
+        from app.services.search_service import SearchService
+        
+        rows = db.session.query(
+            Post.id,
+            Post.title,
+            Post.status,
+            Post.created_at,
+            Post.updated_at,
+            Post.published_at,
+            Post.author_id,
+            User.full_name.label('author_name')
+        ).outerjoin(User, User.id == Post.author_id)
+        facets = db.session.query(Post.status, db.func.count(Post.id))
+        
+        if query:
+            rows = SearchService.search(rows, query, ranked=False)
+            facets = SearchService.search(facets, query, ranked=False)
+        if status:
+            rows = rows.filter(Post.status == status)
+            
+        counts = dict(facets.group_by(Post.status).all())
+        counts['total'] = sum(counts.values())
+        
+        page = keyset_paginate(
+            rows, Post.created_at, Post.id,
+            cursor=cursor, per_page=per_page
         )
+        page.total = counts.get(status, 0) if status else counts['total']
+        return page, counts
     
     @staticmethod
     def get_all_posts():
         """Get all posts (admin function)."""
-        return Post.query.order_by(Post.created_at.desc()).all()
+        return PostService._listing_query().order_by(Post.created_at.desc()).all()
     
     @staticmethod
-    def get_posts_by_tag(tag_id, page=1, per_page=12):
-        """Get published posts filtered by tag."""
-        from app.models.tag import Tag
-        
-        tag = Tag.query.get(tag_id)
-        if not tag:
-            return Post.query.filter_by(id=0).paginate(page=page, per_page=per_page, error_out=False)
+    def get_posts_by_tag(tag_id, cursor=None, per_page=12):
+        """Get published posts filtered by tag, newest first."""
+        from app.models.tag import post_tags
         
-        return tag.posts.filter_by(
-            status=PostStatus.PUBLISHED
-        ).order_by(
-            Post.published_at.desc()
-        ).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
+        query = PostService._listing_query().join(
+            post_tags, post_tags.c.post_id == Post.id
+        ).filter(
+            post_tags.c.tag_id == tag_id,
+            Post.status == PostStatus.PUBLISHED
         )
+        
+        return keyset_paginate(query, Post.published_at, Post.id, cursor=cursor, per_page=per_page)
     
     @staticmethod
-    def get_published_posts_except_tag(tag_id, page=1, per_page=12):
-        """Get published posts excluding specific tag."""
+    def get_published_posts_except_tag(tag_id, cursor=None, per_page=12):
+        """Get published posts excluding specific tag, newest first."""
         from app.models.tag import post_tags
         
         # Get posts that don't have the specified tag
@@ -267,13 +504,9 @@ class PostService:
             post_tags.c.tag_id == tag_id
         )
         
-        return Post.query.filter(
+        query = PostService._listing_query().filter(
             Post.status == PostStatus.PUBLISHED,
             ~Post.id.in_(subquery)
-        ).order_by(
-            Post.published_at.desc()
-        ).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
         )
+        
+        return keyset_paginate(query, Post.published_at, Post.id, cursor=cursor, per_page=per_page)
@@ -0,0 +1,227 @@
+"""Per-request SQL query profiler with N+1 detection."""
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Statements longer than this are truncated in reports
+MAX_STATEMENT_LENGTH = 300
+
+_IN_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))+\s*\)')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """
+    Reduce a SQL statement to its shape.
+    
+    Literals become '?' and IN lists collapse to '(?...)', so the queries an
+    N+1 loop issues for different rows share one shape.
+    """
+    shape = _SPACE.sub(' ', statement).strip()
+    shape = _STRING.sub('?', shape)
+    shape = _NUMBER.sub('?', shape)
+    return _IN_LIST.sub('(?...)', shape)
+
+
+class RequestProfile:
+    """Queries recorded while serving one request."""
+    
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.shape_time = Counter()
+    
+    def record(self, statement, elapsed):
+        """Record one executed statement."""
+        shape = statement_shape(statement)
+        self.query_count += 1
+        self.db_time += elapsed
+        self.shapes[shape] += 1
+        self.shape_time[shape] += elapsed
+    
+    def repeated_shapes(self, threshold):
+        """Get SELECT shapes run at least threshold times, most frequent first."""
+        return [
+            (shape, count) for shape, count in self.shapes.most_common()
+            if count >= threshold and shape.upper().startswith('SELECT')
+        ]
+
+
+class QueryReport:
+    """Per-worker aggregate of profiled requests, shown on the admin page."""
+    
+    def __init__(self, history=200):
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=history)
+        self.endpoints = {}
+        self.since = datetime.utcnow()
+    
+    def add(self, entry):
+        """Fold one finished request into the report."""
+        with self.lock:
+            self.recent.appendleft(entry)
+            stats = self.endpoints.setdefault(entry['endpoint'], {
+                'endpoint': entry['endpoint'],
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'db_ms': 0.0,
+                'total_ms': 0.0,
+                'n_plus_one': 0,
+                'over_budget': 0,
+            })
+            stats['requests'] += 1
+            stats['queries'] += entry['query_count']
+            stats['max_queries'] = max(stats['max_queries'], entry['query_count'])
+            stats['db_ms'] += entry['db_ms']
+            stats['total_ms'] += entry['total_ms']
+            stats['n_plus_one'] += 1 if entry['n_plus_one'] else 0
+            stats['over_budget'] += 1 if entry['over_budget'] else 0
+    
+    def snapshot(self):
+        """Get (endpoint rows by average query count, recent flagged requests)."""
+        with self.lock:
+            rows = []
+            for stats in self.endpoints.values():
+                row = dict(stats)
+                row['avg_queries'] = stats['queries'] / stats['requests']
+                row['avg_db_ms'] = stats['db_ms'] / stats['requests']
+                row['avg_total_ms'] = stats['total_ms'] / stats['requests']
+                rows.append(row)
+            flagged = [e for e in self.recent if e['n_plus_one'] or e['over_budget'] or e['slow']]
+        rows.sort(key=lambda row: row['avg_queries'], reverse=True)
+        return rows, flagged
+    
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self.lock:
+            self.recent.clear()
+            self.endpoints.clear()
+            self.since = datetime.utcnow()
+
+
+class QueryProfiler:
+    """Count and time the SQL each request issues.
+    
+    Engine-level cursor events feed a RequestProfile kept on flask.g; at the
+    end of the request the profile is checked against the N+1 threshold,
+    the slow-request threshold and any per-endpoint query budget, logged if
+    it trips one, and folded into the worker's QueryReport. Reports are per
+    worker process and reset on restart.
+    """
+    
+    @staticmethod
+    def init_app(app):
+        """Install the request hooks if QUERY_PROFILER_ENABLED is set."""
+        if not app.config.get('QUERY_PROFILER_ENABLED', False):
+            return
+            
+        app.extensions['query_profiler'] = QueryReport(
+            history=app.config.get('QUERY_PROFILER_HISTORY', 200)
+        )
+        app.before_request(QueryProfiler._start)
+        app.after_request(QueryProfiler._finish)
+    
+    @staticmethod
+    def is_enabled():
+        """Check if profiling is active for the current app."""
+        return 'query_profiler' in current_app.extensions
+    
+    @staticmethod
+    def get_report():
+        """Get the current worker's QueryReport, or None when disabled."""
+        return current_app.extensions.get('query_profiler')
+    
+    @staticmethod
+    def _start():
+        """Begin profiling the current request."""
+        if request.endpoint == 'static':
+            return
+        g.query_profile = RequestProfile()
+    
+    @staticmethod
+    def _finish(response):
+        """Evaluate, log and record the finished request's profile."""
+        profile = g.pop('query_profile', None)
+        if profile is None:
+            return response
+            
+        config = current_app.config
+        total_ms = (time.perf_counter() - profile.started_at) * 1000
+        db_ms = profile.db_time * 1000
+        endpoint = request.endpoint or request.path
+        
+        repeated = profile.repeated_shapes(config.get('QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 5))
+        budget = config.get('QUERY_BUDGETS', {}).get(endpoint)
+        over_budget = budget is not None and profile.query_count > budget
+        slow = total_ms >= config.get('QUERY_PROFILER_SLOW_MS', 500)
+        
+        response.headers['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{profile.query_count} queries", app;dur={total_ms:.1f}'
+        )
+        
+        if repeated or over_budget or slow:
+            problems = []
+            if slow:
+                problems.append('slow')
+            if over_budget:
+                problems.append(f'over budget ({budget})')
+            if repeated:
+                problems.append('possible N+1: ' + '; '.join(
+                    f'{count}x {shape[:120]}' for shape, count in repeated[:3]
+                ))
+            current_app.logger.warning(
+                f'{request.method} {request.path} [{endpoint}] {profile.query_count} queries, '
+                f'{db_ms:.1f}ms db / {total_ms:.1f}ms total - {", ".join(problems)}'
+            )
+            
+        QueryProfiler.get_report().add({
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': response.status_code,
+            'at': datetime.utcnow(),
+            'query_count': profile.query_count,
+            'db_ms': db_ms,
+            'total_ms': total_ms,
+            'n_plus_one': [
+                {
+                    'shape': shape[:MAX_STATEMENT_LENGTH],
+                    'count': count,
+                    'ms': profile.shape_time[shape] * 1000
+                }
+                for shape, count in repeated
+            ],
+            'over_budget': over_budget,
+            'budget': budget,
+            'slow': slow,
+        })
+        return response
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Note when a statement starts, if the current request is profiled."""
+    if has_app_context() and 'query_profile' in g:
+        conn.info.setdefault('query_profiler_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Record the statement against the current request's profile."""
+    starts = conn.info.get('query_profiler_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_app_context() and 'query_profile' in g:
+        g.query_profile.record(statement, elapsed)
@@ -0,0 +1,218 @@
+"""Full-text search service for posts."""
+import re
+from flask import current_app, has_app_context
+from markupsafe import Markup, escape
+from sqlalchemy import event, text
+from app import db
+from app.models.post import Post
+from app.utils.helpers import normalize_search_text
+
+
+# SQLite FTS5 table mirroring posts.search_text (rowid = posts.id)
+FTS_TABLE = 'posts_fts'
+
+
+def _tokenize(keyword):
+    """Split a keyword into normalized search terms."""
+    return re.findall(r'\w+', normalize_search_text(keyword))
+
+
+def _normalized_with_offsets(text_value):
+    """Normalize text and map each normalized char back to its source index."""
+    chars = []
+    offsets = []
+    for index, char in enumerate(text_value):
+        for normalized in normalize_search_text(char):
+            chars.append(normalized)
+            offsets.append(index)
+    return ''.join(chars), offsets
+
+
+class SearchService:
+    """Service for ranked, accent-insensitive post search."""
+    
+    BACKEND_POSTGRES = 'postgresql'
+    BACKEND_SQLITE_FTS = 'sqlite_fts5'
+    BACKEND_LIKE = 'like'
+    
+    @staticmethod
+    def get_backend(connection=None):
+        """
+        Detect the search backend for the current database.
+        
+        PostgreSQL uses a tsvector expression index, SQLite uses an FTS5
+        table, and anything else falls back to LIKE on the normalized text.
+        """
+        backend = current_app.extensions.get('search_backend')
+        if backend is not None:
+            return backend
+            
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            backend = SearchService.BACKEND_POSTGRES
+        elif dialect == 'sqlite' and SearchService._ensure_fts_table(connection):
+            backend = SearchService.BACKEND_SQLITE_FTS
+        else:
+            backend = SearchService.BACKEND_LIKE
+            
+        current_app.extensions['search_backend'] = backend
+        return backend
+    
+    @staticmethod
+    def _ensure_fts_table(connection=None):
+        """Create the FTS5 table if missing. Returns False if FTS5 is unavailable."""
+        statement = text(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(search_text)'
+        )
+        try:
+            if connection is not None:
+                connection.execute(statement)
+            else:
+                with db.engine.begin() as conn:
+                    conn.execute(statement)
+            return True
+        except Exception as e:
+            current_app.logger.warning(f'FTS5 unavailable, using LIKE search: {str(e)}')
+            return False
+    
+    @staticmethod
+    def search(query, keyword, ranked=True):
+        """
+        Filter and rank a Post query by keyword.
+        
+        Args:
+            query: Base Post query (status filters etc. already applied)
+            keyword: Raw user keyword
+            ranked: Order by relevance; pass False to only filter
+            
+        Returns:
+            Query ordered by relevance, newest first on ties
+        """
+        terms = _tokenize(keyword)
+        if not terms:
+            return query.filter(db.false())
+            
+        backend = SearchService.get_backend()
+        
+        if backend == SearchService.BACKEND_POSTGRES:
+            vector = db.func.to_tsvector('simple', db.func.coalesce(Post.search_text, ''))
+            ts_query = db.func.to_tsquery('simple', ' & '.join(f'{t}:*' for t in terms))
+            query = query.filter(vector.op('@@')(ts_query))
+            if not ranked:
+                return query
+            return query.order_by(
+                db.func.ts_rank(vector, ts_query).desc(),
+                Post.published_at.desc()
+            )
+            
+        if backend == SearchService.BACKEND_SQLITE_FTS:
+            fts = db.table(FTS_TABLE, db.column('rowid'))
+            match = ' '.join(f'"{t}"*' for t in terms)
+            query = query.join(
+                fts, fts.c.rowid == Post.id
+            ).filter(
+                db.literal_column(FTS_TABLE).op('MATCH')(match)
+            )
+            if not ranked:
+                return query
+            return query.order_by(
+                db.func.bm25(db.literal_column(FTS_TABLE)),
+                Post.published_at.desc()
+            )
+            
+        for term in terms:
+            query = query.filter(Post.search_text.like(f'%{term}%'))
+        if not ranked:
+            return query
+        return query.order_by(Post.published_at.desc())
+    
+    @staticmethod
+    def snippet(content, keyword, length=200):
+        """
+        Build an HTML-safe excerpt around the first match with terms wrapped in <mark>.
+        
+        Matching is accent-insensitive; the excerpt keeps the original text.
+        """
+        if not content:
+            return Markup('')
+            
+        normalized, offsets = _normalized_with_offsets(content)
+        matches = []
+        for term in _tokenize(keyword):
+            for m in re.finditer(re.escape(term), normalized):
+                matches.append((offsets[m.start()], offsets[m.end() - 1] + 1))
+        matches.sort()
+        
+        start = max(0, matches[0][0] - length // 4) if matches else 0
+        end = min(len(content), start + length)
+        
+        pieces = [Markup('…')] if start > 0 else []
+        position = start
+        for match_start, match_end in matches:
+            if match_start < position or match_end > end:
+                continue
+            pieces.append(escape(content[position:match_start]))
+            pieces.append(Markup('<mark>%s</mark>') % content[match_start:match_end])
+            position = match_end
+        pieces.append(escape(content[position:end]))
+        if end < len(content):
+            pieces.append(Markup('…'))
+            
+        return Markup('').join(pieces)
+    
+    @staticmethod
+    def reindex_all():
+        """Recompute search_text for every post and rebuild the FTS index."""
+        count = 0
+        for post in Post.query.yield_per(200):
+            post.search_text = Post.build_search_text(post.title, post.content)
+            count += 1
+        db.session.commit()
+        
+        if SearchService.get_backend() == SearchService.BACKEND_SQLITE_FTS:
+            db.session.execute(text(f'DELETE FROM {FTS_TABLE}'))
+            db.session.execute(text(
+                f'INSERT INTO {FTS_TABLE}(rowid, search_text) '
+                f'SELECT id, coalesce(search_text, \'\') FROM posts'
+            ))
+            db.session.commit()
+            
+        current_app.logger.info(f'Search index rebuilt for {count} posts')
+        return count
+
+
+@event.listens_for(Post, 'before_insert')
+@event.listens_for(Post, 'before_update')
+def _refresh_search_text(mapper, connection, target):
+    """Keep normalized search text in sync with title and content."""
+    state = db.inspect(target)
+    if (target.search_text is None
+            or state.attrs.title.history.has_changes()
+            or state.attrs.content.history.has_changes()):
+        target.search_text = Post.build_search_text(target.title, target.content)
+
+
+@event.listens_for(Post, 'after_insert')
+@event.listens_for(Post, 'after_update')
+def _sync_fts_row(mapper, connection, target):
+    """Mirror a post's search text into the SQLite FTS table."""
+    if not has_app_context():
+        return
+    if not db.inspect(target).attrs.search_text.history.has_changes():
+        return
+    if SearchService.get_backend(connection) != SearchService.BACKEND_SQLITE_FTS:
+        return
+    connection.execute(
+        text(f'INSERT OR REPLACE INTO {FTS_TABLE}(rowid, search_text) VALUES (:id, :body)'),
+        {'id': target.id, 'body': target.search_text or ''}
+    )
+
+
+@event.listens_for(Post, 'after_delete')
+def _delete_fts_row(mapper, connection, target):
+    """Remove a deleted post from the SQLite FTS table."""
+    if not has_app_context():
+        return
+    if SearchService.get_backend(connection) != SearchService.BACKEND_SQLITE_FTS:
+        return
+    connection.execute(text(f'DELETE FROM {FTS_TABLE} WHERE rowid = :id'), {'id': target.id})
@@ -0,0 +1,204 @@
+"""Admin statistics service."""
+from datetime import date, datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.comment import Comment
+from app.models.daily_stats import DailyStats
+from app.models.post import Post, PostStatus
+from app.models.user import User, UserRole
+from app.utils.cache import TTLCache
+
+
+# Per-worker snapshots of the dashboard counters and series
+_stats_cache = TTLCache(ttl=30, maxsize=16)
+
+# Daily series sources: rollup column -> (model, extra filter)
+SERIES_SOURCES = {
+    'new_posts': (Post, None),
+    'new_comments': (Comment, None),
+    'new_members': (User, User.role == UserRole.MEMBER)
+}
+
+
+def _as_date(value):
+    """Normalize a SQL date() result (a string on SQLite) to a date."""
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class StatsService:
+    """Service for admin dashboard counters and activity time series."""
+    
+    @staticmethod
+    def get_counters():
+        """
+        Get the dashboard counters, computed with a single query.
+        
+        The snapshot is cached per worker for STATS_CACHE_TTL seconds, so
+        refreshing the dashboard does not rescan the tables.
+        
+        Returns:
+            Dict with total_members, total_posts, published_posts,
+            pending_posts and total_comments
+        """
+        ttl = current_app.config.get('STATS_CACHE_TTL', 30)
+        counters = _stats_cache.get('counters') if ttl else None
+        if counters is not None:
+            return counters
+        
+        def count(model, *criteria):
+            return db.select(db.func.count()).select_from(model).where(*criteria).scalar_subquery()
+            
+        row = db.session.execute(db.select(
+            count(User, User.role == UserRole.MEMBER).label('total_members'),
+            count(Post).label('total_posts'),
+            count(Post, Post.status == PostStatus.PUBLISHED).label('published_posts'),
+            count(Post, Post.status == PostStatus.PENDING_APPROVAL).label('pending_posts'),
+            count(Comment).label('total_comments')
+        )).one()
+        
+        counters = dict(row._mapping)
+        if ttl:
+            _stats_cache.set('counters', counters, ttl=ttl)
+        return counters
+    
+    @staticmethod
+    def get_daily_series(days=30):
+        """
+        Get posts, comments and member signups per UTC day.
+        
+        Ended days come from the daily_stats rollup. Missing days and the
+        last STATS_ROLLUP_WINDOW days are rolled up on demand, so recent
+        deletes show up; today is counted live. The result is cached like
+        get_counters().
+        
+        Args:
+            days: Number of days to return, ending today
+            
+        Returns:
+            List of dicts (oldest first) with day, new_posts, new_comments
+            and new_members
+        """
+        ttl = current_app.config.get('STATS_CACHE_TTL', 30)
+        series = _stats_cache.get(f'series:{days}') if ttl else None
+        if series is not None:
+            return series
+            
+        today = datetime.utcnow().date()
+        start = today - timedelta(days=days - 1)
+        
+        rows = {
+            row.day: row.to_dict()
+            for row in DailyStats.query.filter(DailyStats.day.between(start, today)).all()
+        }
+        
+        refresh_from = today - timedelta(days=current_app.config.get('STATS_ROLLUP_WINDOW', 7))
+        stale = [
+            day for day in (start + timedelta(days=i) for i in range(days - 1))
+            if day not in rows or day >= refresh_from
+        ]
+        if stale:
+            StatsService.rollup(stale[0], stale[-1])
+            rows.update(
+                (row.day, row.to_dict())
+                for row in DailyStats.query.filter(DailyStats.day.between(stale[0], stale[-1])).all()
+            )
+            
+        live = StatsService._count_by_day(today, today).get(today, {})
+        rows[today] = {'day': today.isoformat(), **{column: live.get(column, 0) for column in SERIES_SOURCES}}
+        
+        series = [rows[start + timedelta(days=i)] for i in range(days)]
+        if ttl:
+            _stats_cache.set(f'series:{days}', series, ttl=ttl)
+        return series
+    
+    @staticmethod
+    def rollup(first_day, last_day):
+        """
+        Compute and store daily_stats rows for a range of ended days.
+        
+        Days from today onward are skipped. Existing rows are overwritten:
+        get_daily_series() relies on this to refresh the trailing window,
+        and `flask rollup-stats` to repair older days after bulk deletes.
+        
+        Args:
+            first_day: First day to roll up (inclusive)
+            last_day: Last day to roll up (inclusive)
+            
+        Returns:
+            Number of days written
+        """
+        last_day = min(last_day, datetime.utcnow().date() - timedelta(days=1))
+        if last_day < first_day:
+            return 0
+            
+        counts = StatsService._count_by_day(first_day, last_day)
+        now = datetime.utcnow()
+        values = []
+        day = first_day
+        while day <= last_day:
+            values.append({
+                'day': day,
+                **{column: counts.get(day, {}).get(column, 0) for column in SERIES_SOURCES},
+                'computed_at': now
+            })
+            day += timedelta(days=1)
+            
+        # Concurrent dashboard loads may roll up the same days; upsert so neither fails
+        dialect = db.engine.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            statement = insert(DailyStats)
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=[DailyStats.day],
+                set_={
+                    column: statement.excluded[column]
+                    for column in (*SERIES_SOURCES, 'computed_at')
+                }
+            ), values)
+            db.session.commit()
+            return len(values)
+            
+        from sqlalchemy.exc import IntegrityError
+        for attempt in range(2):
+            existing = {
+                row.day: row
+                for row in DailyStats.query.filter(DailyStats.day.between(first_day, last_day)).all()
+            }
+            for value in values:
+                row = existing.get(value['day']) or DailyStats(day=value['day'])
+                for column in (*SERIES_SOURCES, 'computed_at'):
+                    setattr(row, column, value[column])
+                db.session.add(row)
+            try:
+                db.session.commit()
+                break
+            except IntegrityError:
+                # Another request inserted some of these days first; update them instead
+                db.session.rollback()
+                if attempt:
+                    raise
+        return len(values)
+    
+    @staticmethod
+    def _count_by_day(first_day, last_day):
+        """Count rows per day for each series with one GROUP BY per table."""
+        since = datetime.combine(first_day, datetime.min.time())
+        until = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+        
+        counts = {}
+        for column, (model, criterion) in SERIES_SOURCES.items():
+            day = db.func.date(model.created_at)
+            query = db.session.query(day, db.func.count()).filter(
+                model.created_at >= since,
+                model.created_at < until
+            )
+            if criterion is not None:
+                query = query.filter(criterion)
+            for value, total in query.group_by(day).all():
+                counts.setdefault(_as_date(value), {})[column] = total
+        return counts
@@ -0,0 +1,151 @@
+"""Tag statistics service."""
+from collections import defaultdict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models.post import Post, PostStatus
+from app.models.tag import Tag, post_tags
+
+
+class TagService:
+    """Service for tag post counters.
+    
+    tags.published_post_count is kept in sync by session hooks below, in
+    the same transaction as the post change. Bulk UPDATEs and DB-level
+    cascades bypass the hooks; run `flask recount-tag-stats` after those.
+    """
+    
+    @staticmethod
+    def get_published_counts(tag_ids=None):
+        """
+        Count published posts per tag with a single grouped query.
+        
+        Args:
+            tag_ids: Tags to count, or None for all tags
+            
+        Returns:
+            Dict of tag id -> published post count (tags without posts omitted)
+        """
+        query = db.session.query(
+            post_tags.c.tag_id, db.func.count(post_tags.c.post_id)
+        ).join(
+            Post, Post.id == post_tags.c.post_id
+        ).filter(
+            Post.status == PostStatus.PUBLISHED
+        )
+        if tag_ids is not None:
+            query = query.filter(post_tags.c.tag_id.in_(list(tag_ids)))
+            
+        return dict(query.group_by(post_tags.c.tag_id).all())
+    
+    @staticmethod
+    def recount(tag_ids=None, commit=True):
+        """
+        Recompute published_post_count from post_tags.
+        
+        Args:
+            tag_ids: Tags to repair, or None for all tags
+            commit: Commit the transaction when done
+            
+        Returns:
+            Number of tag rows updated
+        """
+        published = db.session.query(db.func.count(post_tags.c.post_id)).join(
+            Post, Post.id == post_tags.c.post_id
+        ).filter(
+            post_tags.c.tag_id == Tag.id,
+            Post.status == PostStatus.PUBLISHED
+        ).correlate(Tag).scalar_subquery()
+        
+        query = Tag.query
+        if tag_ids is not None:
+            query = query.filter(Tag.id.in_(list(tag_ids)))
+            
+        updated = query.update(
+            {Tag.published_post_count: published},
+            synchronize_session=False
+        )
+        
+        if commit:
+            db.session.commit()
+        return updated
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_tag_count_deltas(session, flush_context, instances):
+    """Work out per-tag counter changes from the posts about to be flushed."""
+    candidates = []
+    for post in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(post, Post):
+            continue
+        state = db.inspect(post)
+        if (post in session.deleted
+                or state.pending
+                or state.attrs.status.history.has_changes()
+                or state.attrs.tags.history.has_changes()):
+            candidates.append((post, state))
+            
+    if not candidates:
+        return
+        
+    # Stored status and tags of persisted posts; attributes may be expired
+    # or overwritten without their old value loaded, so ask the database
+    persisted_ids = [post.id for post, state in candidates if not state.pending]
+    stored_status = {}
+    stored_tags = defaultdict(set)
+    if persisted_ids:
+        with session.no_autoflush:
+            stored_status = dict(session.execute(
+                db.select(Post.id, Post.status).where(Post.id.in_(persisted_ids))
+            ).all())
+            rows = session.execute(
+                db.select(post_tags.c.post_id, post_tags.c.tag_id).where(
+                    post_tags.c.post_id.in_(persisted_ids)
+                )
+            )
+            for post_id, tag_id in rows:
+                stored_tags[post_id].add(tag_id)
+                
+    deltas = session.info.setdefault('tag_count_deltas', defaultdict(int))
+    for post, state in candidates:
+        before = stored_tags[post.id] if not state.pending else set()
+        if not state.pending and stored_status.get(post.id) == PostStatus.PUBLISHED:
+            for tag_id in before:
+                deltas[tag_id] -= 1
+        if post in session.deleted or post.status != PostStatus.PUBLISHED:
+            continue
+            
+        tag_history = state.attrs.tags.history
+        removed = {tag.id for tag in tag_history.deleted}
+        for tag_id in before - removed:
+            deltas[tag_id] += 1
+        for tag in tag_history.added:
+            # New tags have no id until flushed; resolved in after_flush
+            deltas[tag.id if tag.id is not None else tag] += 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_tag_count_deltas(session, flush_context):
+    """Apply collected counter changes inside the flush's transaction."""
+    deltas = session.info.pop('tag_count_deltas', None)
+    if not deltas:
+        return
+        
+    by_delta = defaultdict(list)
+    for key, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(key if isinstance(key, int) else key.id)
+            
+    tags = Tag.__table__
+    for delta, tag_ids in by_delta.items():
+        session.connection().execute(
+            tags.update().where(tags.c.id.in_(tag_ids)).values(
+                published_post_count=tags.c.published_post_count + delta
+            )
+        )
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_tag_count_deltas(session):
+    """Drop deltas from a flush that never happened."""
+    session.info.pop('tag_count_deltas', None)
@@ -0,0 +1,298 @@
+"""Resumable chunked upload service for post videos."""
+import hashlib
+import os
+import re
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.media import Media, MediaType
+from app.models.upload_session import UploadSession, UploadStatus
+from app.services.job_service import JobService
+from app.services.page_cache import PageCache
+from app.utils.validators import allowed_file, validate_video_mime, sanitize_filename
+
+
+# Size of the blocks copied from the request stream to disk
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def _absolute(path):
+    """Resolve a path relative to UPLOAD_FOLDER."""
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], path)
+
+
+def _part_file(upload):
+    """Resolve a session's partial file under UPLOAD_TMP_FOLDER."""
+    return os.path.join(current_app.config['UPLOAD_TMP_FOLDER'], upload.part_path)
+
+
+def _remove_part(upload):
+    """Delete a session's partial file if it exists."""
+    filepath = _part_file(upload)
+    if os.path.exists(filepath):
+        os.remove(filepath)
+
+
+class UploadService:
+    """Service for resumable video uploads.
+    
+    The client opens a session, sends the file as sequential chunks (each a
+    raw request body, never parsed as a form) and finalizes it. Chunks are
+    appended to a .part file in UPLOAD_TMP_FOLDER, outside the served
+    uploads tree, and moved into the videos folder on finalize; a dropped
+    connection is resumed from the session's received_size.
+    """
+    
+    @staticmethod
+    def start(user, post, filename, mime_type, total_size, checksum=None):
+        """
+        Open an upload session for a post video.
+        
+        Args:
+            user: Uploading user
+            post: Post the video will be attached to
+            filename: Original file name
+            mime_type: Declared MIME type
+            total_size: Size of the whole file in bytes
+            checksum: Optional SHA-256 hex digest of the whole file
+            
+        Returns:
+            Tuple of (UploadSession or None, error message)
+        """
+        if not allowed_file(filename, 'video'):
+            return None, 'Định dạng video không được hỗ trợ'
+            
+        if not validate_video_mime(mime_type):
+            return None, 'Loại file không hợp lệ'
+            
+        max_size = current_app.config.get('MAX_VIDEO_SIZE', 50 * 1024 * 1024)
+        if not isinstance(total_size, int) or total_size <= 0:
+            return None, 'Kích thước file không hợp lệ'
+        if total_size > max_size:
+            return None, f'Video quá lớn (tối đa {max_size // (1024 * 1024)}MB)'
+            
+        if checksum is not None:
+            checksum = str(checksum).lower()
+            if not re.fullmatch(r'[0-9a-f]{64}', checksum):
+                return None, 'Checksum không hợp lệ'
+                
+        try:
+            original_filename = sanitize_filename(filename)
+            ext = original_filename.rsplit('.', 1)[1].lower()
+            session_id = uuid.uuid4().hex
+            ttl = current_app.config.get('UPLOAD_SESSION_TTL', 24 * 3600)
+            
+            upload = UploadSession(
+                id=session_id,
+                user_id=user.id,
+                post_id=post.id,
+                filename=original_filename,
+                mime_type=mime_type,
+                total_size=total_size,
+                checksum=checksum,
+                file_path=f'videos/{session_id}.{ext}',
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+            )
+            
+            os.makedirs(current_app.config['UPLOAD_TMP_FOLDER'], exist_ok=True)
+            open(_part_file(upload), 'wb').close()
+            
+            db.session.add(upload)
+            db.session.commit()
+            
+            # Reclaim disk from abandoned sessions
+            JobService.enqueue('uploads.cleanup_expired')
+            
+            return upload, None
+            
+        except PermissionError:
+            db.session.rollback()
+            current_app.logger.error('Cannot start video upload - read-only filesystem')
+            return None, 'Lỗi: Không thể lưu video'
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error starting upload: {str(e)}')
+            return None, 'Lỗi khi bắt đầu upload'
+    
+    @staticmethod
+    def get_session(session_id, user):
+        """Get an upload session owned by user, or None."""
+        return UploadSession.query.filter_by(id=session_id, user_id=user.id).first()
+    
+    @staticmethod
+    def append_chunk(upload, offset, stream, length, checksum=None):
+        """
+        Append one chunk, streamed from the request body to disk.
+        
+        Args:
+            upload: Active UploadSession
+            offset: Byte offset the chunk starts at (must equal received_size)
+            stream: File-like request body
+            length: Chunk size from Content-Length
+            checksum: Optional SHA-256 hex digest of the chunk
+            
+        Returns:
+            Tuple of (UploadSession or None, error message)
+        """
+        if upload.status != UploadStatus.ACTIVE:
+            return None, 'Phiên upload đã kết thúc'
+        if upload.is_expired():
+            return None, 'Phiên upload đã hết hạn'
+        if offset != upload.received_size:
+            return None, f'Sai vị trí chunk (cần offset {upload.received_size})'
+            
+        chunk_size = current_app.config.get('UPLOAD_CHUNK_SIZE', 2 * 1024 * 1024)
+        if not length or length > chunk_size:
+            return None, f'Chunk phải từ 1 byte đến {chunk_size} bytes'
+        if offset + length > upload.total_size:
+            return None, 'Chunk vượt quá kích thước file'
+            
+        # Claim the byte range before writing: a concurrent append at the
+        # same offset loses here and never touches the .part file
+        claimed = UploadSession.query.filter_by(
+            id=upload.id, received_size=offset
+        ).update(
+            {UploadSession.received_size: offset + length},
+            synchronize_session=False
+        )
+        db.session.commit()
+        
+        if not claimed:
+            return None, 'Chunk đã được ghi bởi yêu cầu khác'
+            
+        digest = hashlib.sha256()
+        written = 0
+        error = None
+        
+        try:
+            with open(_part_file(upload), 'r+b') as part:
+                part.seek(offset)
+                while written < length:
+                    block = stream.read(min(STREAM_BLOCK_SIZE, length - written))
+                    if not block:
+                        break
+                    part.write(block)
+                    digest.update(block)
+                    written += len(block)
+                    
+                if written != length:
+                    error = 'Chunk bị gián đoạn, vui lòng gửi lại'
+                elif checksum and digest.hexdigest() != checksum.lower():
+                    error = 'Checksum chunk không khớp, vui lòng gửi lại'
+                    
+                if error:
+                    # Discard the partial chunk so the client can retry it
+                    part.truncate(offset)
+                    
+        except FileNotFoundError:
+            error = 'Dữ liệu upload không còn tồn tại'
+        except Exception as e:
+            current_app.logger.error(f'Error writing chunk for upload {upload.id}: {str(e)}')
+            error = 'Lỗi khi ghi chunk, vui lòng gửi lại'
+            
+        if error:
+            # Release the claim so the same offset can be retried
+            UploadSession.query.filter_by(
+                id=upload.id, received_size=offset + length
+            ).update(
+                {UploadSession.received_size: offset},
+                synchronize_session=False
+            )
+            db.session.commit()
+            return None, error
+            
+        db.session.refresh(upload)
+        return upload, None
+    
+    @staticmethod
+    def finalize(upload):
+        """
+        Verify a fully received upload and attach it to its post.
+        
+        Idempotent: finalizing a completed session returns its media.
+        
+        Returns:
+            Tuple of (Media or None, error message)
+        """
+        if upload.status == UploadStatus.COMPLETE:
+            media = Media.query.get(upload.media_id) if upload.media_id else None
+            if media is None:
+                return None, 'Video đã bị xóa'
+            return media, None
+        if upload.is_expired():
+            return None, 'Phiên upload đã hết hạn'
+        if upload.received_size != upload.total_size:
+            return None, f'Chưa nhận đủ dữ liệu ({upload.received_size}/{upload.total_size} bytes)'
+            
+        part_path = _part_file(upload)
+        
+        if upload.checksum:
+            digest = hashlib.sha256()
+            with open(part_path, 'rb') as part:
+                for block in iter(lambda: part.read(1024 * 1024), b''):
+                    digest.update(block)
+            if digest.hexdigest() != upload.checksum:
+                UploadService.abort(upload)
+                return None, 'Checksum video không khớp, vui lòng upload lại'
+                
+        try:
+            # shutil.move copies when the temp folder is on another filesystem
+            os.makedirs(_absolute('videos'), exist_ok=True)
+            shutil.move(part_path, _absolute(upload.file_path))
+            
+            media = Media(
+                post_id=upload.post_id,
+                type=MediaType.VIDEO,
+                file_path=upload.file_path,
+                filename=upload.filename,
+                mime_type=upload.mime_type,
+                file_size=upload.total_size
+            )
+            db.session.add(media)
+            db.session.flush()
+            
+            upload.status = UploadStatus.COMPLETE
+            upload.media_id = media.id
+            db.session.commit()
+            PageCache.invalidate_post(upload.post_id)
+            
+            current_app.logger.info(f'Video upload {upload.id} finalized as media {media.id}')
+            return media, None
+            
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error finalizing upload {upload.id}: {str(e)}')
+            return None, 'Lỗi khi hoàn tất upload'
+    
+    @staticmethod
+    def abort(upload):
+        """Delete an upload session and its partial file."""
+        if upload.status == UploadStatus.ACTIVE:
+            _remove_part(upload)
+        db.session.delete(upload)
+        db.session.commit()
+    
+    @staticmethod
+    def cleanup_expired():
+        """Delete expired sessions and their partial files. Returns count removed."""
+        expired = UploadSession.query.filter(
+            UploadSession.expires_at < datetime.utcnow()
+        ).all()
+        
+        for upload in expired:
+            if upload.status == UploadStatus.ACTIVE:
+                _remove_part(upload)
+            db.session.delete(upload)
+        db.session.commit()
+        
+        if expired:
+            current_app.logger.info(f'Removed {len(expired)} expired upload sessions')
+        return len(expired)
+
+
+@JobService.task('uploads.cleanup_expired')
+def _cleanup_expired_task():
+    """Background task: remove abandoned upload sessions."""
+    UploadService.cleanup_expired()
@@ -1,8 +1,16 @@
 """User service for member management."""
 from datetime import datetime
 from flask import current_app
+from sqlalchemy.orm import load_only
 from app import db
+from app.models.belt_promotion import BeltPromotion
 from app.models.user import User, UserRole, UserStatus
+from app.services.identity_cache import IdentityCache
+from app.utils.pagination import keyset_paginate
+
+
+# Promotion board group for members who have no belt yet
+NO_BELT_LABEL = 'Chưa có đai'
 
 
 class UserService:
@@ -79,6 +87,7 @@ class UserService:
             user.updated_at = datetime.utcnow()
             
             db.session.commit()
+            IdentityCache.invalidate(user.id)
             
             return user, None
             
@@ -123,6 +132,7 @@ class UserService:
         try:
             db.session.delete(user)
             db.session.commit()
+            IdentityCache.invalidate(user_id)
             
             current_app.logger.info(f'User deleted: {user.username} (ID: {user_id})')
             
@@ -149,27 +159,72 @@ class UserService:
         return User.query.order_by(User.created_at.desc()).all()
     
     @staticmethod
-    def search_users(query, page=1, per_page=20):
+    def search_users(query, cursor=None, per_page=20, count_cap=1000):
         """Search users by name, email, student ID, or username."""
+        users = UserService.apply_search(User.query, query)
+        
+        return keyset_paginate(
+            users, User.created_at, User.id,
+            cursor=cursor, per_page=per_page, count_cap=count_cap
+        )
+    
+    @staticmethod
+    def apply_search(users, query):
+        """
+        Filter a query over users the way the admin user search does.
+        
+        Args:
+            users: Query that selects from users (entities or columns)
+            query: Search text, or '' for no filter
+            
+        Returns:
+            Filtered query
+        """
         from sqlalchemy import or_
         
         if not query:
-            return User.query.order_by(User.created_at.desc()).paginate(
-                page=page, per_page=per_page, error_out=False
-            )
-        
+            return users
+            
         search_pattern = f'%{query}%'
-        return User.query.filter(
+        return users.filter(
             or_(
                 User.full_name.ilike(search_pattern),
                 User.email.ilike(search_pattern),
                 User.student_id.ilike(search_pattern),
                 User.username.ilike(search_pattern)
             )
-        ).order_by(User.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
         )
     
+    @staticmethod
+    def get_active_members_by_belt():
+        """
+        Get active members grouped by belt for the promotion board.
+        
+        Loads only the columns the board shows, with one query served by
+        ix_users_role_status_belt, and groups in Python.
+        
+        Returns:
+            Dict of belt -> members ordered by name, in BELT_ORDER followed by
+            NO_BELT_LABEL for members without a belt
+        """
+        from app.models.user import BELT_ORDER
+        
+        members = User.query.options(
+            load_only(User.id, User.full_name, User.student_id, User.belt)
+        ).filter(
+            User.role == UserRole.MEMBER,
+            User.status == UserStatus.ACTIVE
+        ).order_by(User.full_name).all()
+        
+        users_by_belt = {belt: [] for belt in BELT_ORDER}
+        users_by_belt[NO_BELT_LABEL] = []
+        for member in members:
+            if not member.belt:
+                users_by_belt[NO_BELT_LABEL].append(member)
+            elif member.belt in users_by_belt:
+                users_by_belt[member.belt].append(member)
+        return users_by_belt
+    
     @staticmethod
     def toggle_user_status(user_id):
         """Toggle user active/inactive status."""
@@ -182,6 +237,7 @@ class UserService:
             user.updated_at = datetime.utcnow()
             
             db.session.commit()
+            IdentityCache.invalidate(user.id)
             
             return user, None
             
@@ -191,8 +247,8 @@ class UserService:
             return None, 'Lỗi khi thay đổi trạng thái'
     
     @staticmethod
-    def promote_belt(user_id, new_belt):
-        """Promote single user to new belt."""
+    def promote_belt(user_id, new_belt, promoted_by=None):
+        """Promote single user to new belt and record it in the belt history."""
         from app.models.user import BELT_ORDER
         
         user = User.query.get(user_id)
@@ -210,8 +266,16 @@ class UserService:
             old_belt = user.belt
             user.belt = new_belt
             user.updated_at = datetime.utcnow()
+            db.session.add(BeltPromotion(
+                user_id=user.id,
+                from_belt=old_belt or None,
+                to_belt=new_belt,
+                promoted_by_id=promoted_by.id if promoted_by else None,
+                promoted_at=user.updated_at
+            ))
             
             db.session.commit()
+            IdentityCache.invalidate(user.id)
             
             current_app.logger.info(f'Belt promotion: {user.username} from {old_belt} to {new_belt}')
             return user, None
@@ -222,17 +286,283 @@ class UserService:
             return None, 'Lỗi khi thăng đai'
     
     @staticmethod
-    def bulk_promote_belt(user_ids, new_belt):
-        """Promote multiple users to new belt."""
-        results = []
-        errors = []
+    def bulk_promote_belt(user_ids, new_belt, promoted_by=None):
+        """
+        Promote multiple users to a new belt in one transaction.
+        
+        The target belt is validated once, eligible users are updated with a
+        single UPDATE ... WHERE id IN (...) and their history rows are
+        inserted as one batch. Users the UPDATE skips because their belt
+        changed concurrently are reported as errors, not as promoted.
         
+        Args:
+            user_ids: IDs of users to promote
+            new_belt: Target belt (must be in BELT_ORDER)
+            promoted_by: Admin performing the promotion, or None
+            
+        Returns:
+            Tuple of (promoted users, list of per-user error messages)
+        """
+        from app.models.user import BELT_ORDER
+        
+        if new_belt not in BELT_ORDER:
+            return [], [f'Đai không hợp lệ: {new_belt}']
+        new_index = BELT_ORDER.index(new_belt)
+        
+        user_ids = list(dict.fromkeys(user_ids))
+        users = {
+            user.id: user
+            for user in User.query.options(
+                load_only(User.id, User.username, User.full_name, User.belt)
+            ).filter(User.id.in_(user_ids)).all()
+        }
+        
+        promoted = []
+        errors = []
         for user_id in user_ids:
-            user, error = UserService.promote_belt(user_id, new_belt)
-            if error:
-                errors.append(f'User {user_id}: {error}')
+            user = users.get(user_id)
+            if user is None:
+                errors.append(f'User {user_id}: Người dùng không tồn tại')
+            elif user.belt in BELT_ORDER and BELT_ORDER.index(user.belt) >= new_index:
+                errors.append(f'{user.full_name}: Không thể hạ đai từ {user.belt} xuống {new_belt}')
             else:
-                results.append(user)
+                promoted.append(user)
+                
+        if not promoted:
+            return [], errors
+            
+        now = datetime.utcnow()
+        promoter_id = promoted_by.id if promoted_by else None
+        candidate_ids = [user.id for user in promoted]
         
-        return results, errors
-
+        try:
+            # Re-check the rank in SQL so a concurrent higher promotion is never undone
+            update = db.update(User).where(
+                User.id.in_(candidate_ids),
+                db.or_(User.belt.is_(None), User.belt.notin_(BELT_ORDER[new_index:]))
+            ).values(belt=new_belt, updated_at=now)
+            
+            if db.engine.dialect.update_returning:
+                updated_ids = set(db.session.execute(
+                    update.returning(User.id),
+                    execution_options={'synchronize_session': False}
+                ).scalars())
+            else:
+                db.session.execute(update, execution_options={'synchronize_session': False})
+                updated_ids = set(db.session.execute(
+                    db.select(User.id).where(
+                        User.id.in_(candidate_ids),
+                        User.belt == new_belt,
+                        User.updated_at == now
+                    )
+                ).scalars())
+                
+            # Rows the guard skipped were changed by someone else since they were read
+            skipped = [user for user in promoted if user.id not in updated_ids]
+            errors.extend(
+                f'{user.full_name}: Đai vừa được thay đổi bởi thao tác khác, vui lòng thử lại'
+                for user in skipped
+            )
+            promoted = [user for user in promoted if user.id in updated_ids]
+            
+            if promoted:
+                db.session.execute(db.insert(BeltPromotion), [
+                    {
+                        'user_id': user.id,
+                        'from_belt': user.belt or None,
+                        'to_belt': new_belt,
+                        'promoted_by_id': promoter_id,
+                        'promoted_at': now
+                    }
+                    for user in promoted
+                ])
+            db.session.commit()
+            IdentityCache.invalidate(*(user.id for user in promoted))
+            
+            current_app.logger.info(
+                f'Bulk belt promotion: {len(promoted)} users to {new_belt}, {len(skipped)} skipped'
+            )
+            return promoted, errors
+            
+        except Exception as e:
+            current_app.logger.error(f'Error in bulk belt promotion: {str(e)}')
+            db.session.rollback()
+            return [], errors + ['Lỗi khi thăng đai']
+    
+    @staticmethod
+    def import_users_csv(stream, default_password=None, dry_run=False, processes=None, max_rows=None):
+        """
+        Create member accounts in bulk from a CSV file.
+        
+        Columns (header row required, extra columns ignored): username,
+        full_name, password, email, student_id, belt, join_date (YYYY-MM-DD).
+        Rows with a blank password get default_password. Every row is
+        validated first; uniqueness against existing users is checked with
+        one query. Passwords of the valid rows are hashed, in a process pool
+        when processes > 1, and the users are inserted in batches within one transaction.
+        Invalid rows are skipped and reported.
+        
+        Args:
+            stream: Text file object or iterable of CSV lines
+            default_password: Password for rows that leave it blank
+            dry_run: Only validate, create nothing
+            processes: Hashing processes (defaults to USER_IMPORT_HASH_PROCESSES)
+            max_rows: Row limit (defaults to USER_IMPORT_MAX_ROWS)
+            
+        Returns:
+            Tuple of (usernames created, or that would be on a dry run;
+            list of per-row error messages)
+        """
+        import csv
+        from datetime import date
+        from app.models.user import BELT_ORDER
+        
+        if max_rows is None:
+            max_rows = current_app.config.get('USER_IMPORT_MAX_ROWS', 2000)
+        reader = csv.DictReader(stream)
+        
+        try:
+            header = [(name or '').strip().lower() for name in (reader.fieldnames or [])]
+        except (csv.Error, UnicodeDecodeError):
+            return [], ['File CSV không hợp lệ']
+        missing = [column for column in ('username', 'full_name') if column not in header]
+        if missing:
+            return [], [f'Thiếu cột bắt buộc: {", ".join(missing)}']
+        reader.fieldnames = header
+        
+        rows = []
+        errors = []
+        labels = {'username': 'Tên đăng nhập', 'email': 'Email', 'student_id': 'MSSV'}
+        seen = {field: set() for field in labels}
+        try:
+            for line, record in enumerate(reader, start=2):
+                if len(rows) + len(errors) >= max_rows:
+                    errors.append(f'Chỉ nhập tối đa {max_rows} dòng mỗi lần')
+                    break
+                    
+                values = {key: (value or '').strip() for key, value in record.items() if key}
+                if not any(values.values()):
+                    continue
+                    
+                row = {
+                    'line': line,
+                    'username': values.get('username', ''),
+                    'full_name': values.get('full_name', ''),
+                    'password': values.get('password') or default_password,
+                    'email': values.get('email') or None,
+                    'student_id': values.get('student_id') or None,
+                    'belt': values.get('belt') or None,
+                    'join_date': None
+                }
+                
+                error = None
+                if not row['username'] or len(row['username']) > 80:
+                    error = 'Tên đăng nhập trống hoặc quá dài'
+                elif not row['full_name'] or len(row['full_name']) > 120:
+                    error = 'Họ tên trống hoặc quá dài'
+                elif not row['password']:
+                    error = 'Thiếu mật khẩu'
+                elif row['email'] and (len(row['email']) > 120 or '@' not in row['email']):
+                    error = f'Email không hợp lệ: {row["email"]}'
+                elif row['student_id'] and len(row['student_id']) > 20:
+                    error = 'MSSV quá dài'
+                elif row['belt'] and row['belt'] not in BELT_ORDER:
+                    error = f'Đai không hợp lệ: {row["belt"]}'
+                elif values.get('join_date'):
+                    try:
+                        row['join_date'] = date.fromisoformat(values['join_date'])
+                    except ValueError:
+                        error = f'Ngày gia nhập không hợp lệ: {values["join_date"]}'
+                if error is None:
+                    for field in seen:
+                        if row[field] and row[field] in seen[field]:
+                            error = f'{labels[field]} bị trùng trong file: {row[field]}'
+                            break
+                            
+                if error:
+                    errors.append(f'Dòng {line}: {error}')
+                    continue
+                for field in seen:
+                    if row[field]:
+                        seen[field].add(row[field])
+                rows.append(row)
+        except (csv.Error, UnicodeDecodeError) as e:
+            errors.append(f'File CSV không hợp lệ: {str(e)}')
+            
+        if not rows:
+            return [], errors
+            
+        # One query for every username, email and student ID already taken
+        taken = {field: set() for field in labels}
+        for username, email, student_id in db.session.query(
+            User.username, User.email, User.student_id
+        ).filter(db.or_(
+            User.username.in_(seen['username']),
+            User.email.in_(seen['email']),
+            User.student_id.in_(seen['student_id'])
+        )):
+            taken['username'].add(username)
+            taken['email'].add(email)
+            taken['student_id'].add(student_id)
+            
+        valid = []
+        for row in rows:
+            conflict = next((field for field in taken if row[field] and row[field] in taken[field]), None)
+            if conflict:
+                errors.append(f'Dòng {row["line"]}: {labels[conflict]} đã tồn tại: {row[conflict]}')
+            else:
+                valid.append(row)
+                
+        if dry_run or not valid:
+            return [row['username'] for row in valid], errors
+            
+        hashes = UserService._hash_passwords([row['password'] for row in valid], processes)
+        now = datetime.utcnow()
+        batch_size = current_app.config.get('USER_IMPORT_BATCH_SIZE', 500)
+        
+        try:
+            for start in range(0, len(valid), batch_size):
+                db.session.execute(db.insert(User), [
+                    {
+                        'username': row['username'],
+                        'password_hash': password_hash,
+                        'full_name': row['full_name'],
+                        'email': row['email'],
+                        'student_id': row['student_id'],
+                        'belt': row['belt'],
+                        'join_date': row['join_date'],
+                        'role': UserRole.MEMBER,
+                        'status': UserStatus.ACTIVE,
+                        'created_at': now,
+                        'updated_at': now
+                    }
+                    for row, password_hash in zip(
+                        valid[start:start + batch_size], hashes[start:start + batch_size]
+                    )
+                ])
+            db.session.commit()
+            
+            current_app.logger.info(f'Bulk user import: {len(valid)} members created')
+            return [row['username'] for row in valid], errors
+            
+        except Exception as e:
+            current_app.logger.error(f'Error in bulk user import: {str(e)}')
+            db.session.rollback()
+            return [], errors + ['Lỗi khi lưu người dùng, không có tài khoản nào được tạo']
+    
+    @staticmethod
+    def _hash_passwords(passwords, processes=None):
+        """Hash passwords, in a process pool when there are enough of them."""
+        from werkzeug.security import generate_password_hash
+        
+        if processes is None:
+            processes = current_app.config.get('USER_IMPORT_HASH_PROCESSES', 2)
+        processes = min(processes, len(passwords))
+        
+        if processes <= 1 or len(passwords) < 8:
+            return [generate_password_hash(password) for password in passwords]
+            
+        from concurrent.futures import ProcessPoolExecutor
+        chunksize = max(1, len(passwords) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
@@ -0,0 +1,135 @@
+"""Caching utilities."""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class TTLCache:
+    """Thread-safe, size-bounded cache whose entries expire after a TTL.
+    
+    Each gunicorn worker holds its own copy, so keep TTLs short for
+    values that other workers may change.
+    """
+    
+    def __init__(self, ttl=10, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """Get a cached value, or default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value, ttl=None):
+        """Store a value for ttl seconds (defaults to the cache TTL)."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def delete(self, key):
+        """Remove a key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    """Cache stored in a SQLite file, shared by every worker on the host.
+    
+    Values must be JSON-serializable. Expired rows are pruned lazily and the
+    table is trimmed to roughly maxsize entries (oldest expiry first).
+    """
+    
+    PRUNE_EVERY = 100
+    
+    def __init__(self, path, ttl=60, maxsize=1024):
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._writes = 0
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+    
+    @contextmanager
+    def _connect(self):
+        """Open an autocommit connection for one operation."""
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def get(self, key, default=None):
+        """Get a cached value, or default if missing or expired."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT value FROM cache WHERE key = ? AND expires_at >= ?',
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return default
+        return json.loads(row[0])
+    
+    def set(self, key, value, ttl=None):
+        """Store a value for ttl seconds (defaults to the cache TTL)."""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), expires_at)
+            )
+            
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self._prune()
+    
+    def delete(self, key):
+        """Remove a key if present."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache')
+    
+    def _prune(self):
+        """Drop expired rows, then the soonest-expiring rows above maxsize."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache WHERE expires_at < ?', (time.time(),))
+            conn.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)',
+                (self.maxsize,)
+            )
@@ -1,4 +1,10 @@
 """Helper utilities."""
+import hashlib
+import html
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
 from datetime import datetime
 import markdown as md
 from app.utils.validators import sanitize_html
@@ -70,6 +76,80 @@ def markdown_to_html(text):
     return sanitize_html(html)
 
 
+# Block-level closing tags that separate words once markup is stripped
+_BLOCK_BREAK = re.compile(r'<br\s*/?>|</(?:p|li|h[1-6]|blockquote|pre|tr|td|th)>', re.IGNORECASE)
+
+
+def markdown_to_text(text):
+    """Convert Markdown to plain text with collapsed whitespace."""
+    if not text:
+        return ''
+    import bleach
+    
+    rendered = md.markdown(
+        text,
+        extensions=[
+            'markdown.extensions.extra',
+            'markdown.extensions.sane_lists'
+        ]
+    )
+    rendered = _BLOCK_BREAK.sub(' ', rendered)
+    plain = html.unescape(bleach.clean(rendered, tags=[], strip=True))
+    return ' '.join(plain.split())
+
+
+# In-process LRU of rendered post bodies, keyed by (post_id, content_hash)
+RENDERED_CACHE_SIZE = 256
+_rendered_cache = OrderedDict()
+_rendered_cache_lock = threading.Lock()
+
+
+def content_hash(text):
+    """Get SHA-256 hex digest of text content."""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def render_markdown_cached(post_id, text, digest=None):
+    """Convert Markdown to HTML, reusing a cached render when available."""
+    if digest is None:
+        digest = content_hash(text)
+    key = (post_id, digest)
+    
+    with _rendered_cache_lock:
+        html = _rendered_cache.get(key)
+        if html is not None:
+            _rendered_cache.move_to_end(key)
+            return html
+    
+    html = markdown_to_html(text)
+    
+    with _rendered_cache_lock:
+        _rendered_cache[key] = html
+        _rendered_cache.move_to_end(key)
+        while len(_rendered_cache) > RENDERED_CACHE_SIZE:
+            _rendered_cache.popitem(last=False)
+    
+    return html
+
+
+def invalidate_rendered_cache(post_id):
+    """Drop all cached renders for a post."""
+    with _rendered_cache_lock:
+        for key in [k for k in _rendered_cache if k[0] == post_id]:
+            del _rendered_cache[key]
+
+
+def normalize_search_text(text):
+    """Lowercase text and strip Vietnamese diacritics for accent-insensitive search."""
+    if not text:
+        return ''
+    
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFD', text)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return unicodedata.normalize('NFC', stripped).lower()
+
+
 def truncate_text(text, length=100, suffix='...'):
     """Truncate text to specified length."""
     if not text:
@@ -0,0 +1,192 @@
+"""Keyset (cursor) pagination utilities."""
+import base64
+import json
+from datetime import datetime
+from app import db
+
+
+def encode_cursor(sort_values, row_id, direction='next'):
+    """Encode a (sort values..., id) position into an opaque URL-safe cursor."""
+    key = [value.isoformat() if isinstance(value, datetime) else value for value in sort_values]
+    raw = json.dumps({'k': key + [row_id], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _is_int(value):
+    """JSON integer check (bool is an int subclass in Python)."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _decode_value(value, value_type):
+    """Convert a JSON cursor value to value_type; raise ValueError on mismatch."""
+    if value is None:
+        return None
+    if value_type is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if value_type is int and _is_int(value):
+        return value
+    raise ValueError(f'Unexpected cursor value {value!r}')
+
+
+def decode_cursor(cursor, value_types=(datetime,)):
+    """
+    Decode a cursor into (sort values, id, direction), or None if invalid.
+    
+    Cursors come from the query string, so every part is checked against
+    the expected type before it can reach a SQL comparison.
+    
+    Args:
+        cursor: Opaque cursor string
+        value_types: Python types of the sort columns (datetime or int)
+        
+    Returns:
+        Tuple of (tuple of sort values, id, direction), or None
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        *sort_values, row_id = data['k']
+        direction = data.get('d', 'next')
+        if len(sort_values) != len(value_types):
+            return None
+        sort_values = tuple(
+            _decode_value(value, value_type)
+            for value, value_type in zip(sort_values, value_types)
+        )
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+        
+    if direction not in ('next', 'prev') or not _is_int(row_id):
+        return None
+    return sort_values, row_id, direction
+
+
+class KeysetPage:
+    """One page of keyset-paginated results."""
+    
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None,
+                 total=None, total_is_estimate=False):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+    
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+    
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def _seek_filter(sort_columns, id_column, position, nulls_last):
+    """
+    Build the WHERE clause for rows after position in walk order.
+    
+    'next' walks (sort_columns, id) descending, 'prev' ascending. With
+    nulls_last, rows whose leading sort column is NULL come after every
+    non-NULL row going forward, and are compared on the remaining columns
+    among themselves.
+    """
+    sort_values, row_id, direction = position
+    forward = direction == 'next'
+    
+    def beyond(columns, values):
+        key, bound = db.tuple_(*columns, id_column), (*values, row_id)
+        return key < bound if forward else key > bound
+        
+    if not nulls_last:
+        return beyond(sort_columns, sort_values)
+        
+    lead, rest = sort_columns[0], sort_columns[1:]
+    if sort_values[0] is None:
+        in_null_tail = db.and_(lead.is_(None), beyond(rest, sort_values[1:]))
+        return in_null_tail if forward else db.or_(lead.isnot(None), in_null_tail)
+    if forward:
+        return db.or_(beyond(sort_columns, sort_values), lead.is_(None))
+    return beyond(sort_columns, sort_values)
+
+
+def _walk_order(sort_columns, id_column, forward, nulls_last):
+    """ORDER BY for walking (sort_columns, id) newest-first or backwards."""
+    order = []
+    for index, column in enumerate(sort_columns):
+        clause = column.desc() if forward else column.asc()
+        if nulls_last and index == 0:
+            clause = clause.nulls_last() if forward else clause.nulls_first()
+        order.append(clause)
+    order.append(id_column.desc() if forward else id_column.asc())
+    return order
+
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, per_page=20, count_cap=None,
+                    nulls_last=False):
+    """
+    Paginate a query newest-first on (sort_column, id_column) without OFFSET.
+    
+    Args:
+        query: Base query (filters applied, no ordering)
+        sort_column: Timestamp column, e.g. Post.published_at, or a tuple of
+            columns compared in order, e.g. (Post.last_commented_at, Post.comment_count)
+        id_column: Unique tiebreaker column, e.g. Post.id
+        cursor: Opaque cursor from a previous page, or None for the first page
+        per_page: Page size
+        count_cap: If set, also count matches up to this many (approximate total)
+        nulls_last: List rows whose (first) sort column is NULL after all others
+        
+    Returns:
+        KeysetPage
+    """
+    sort_columns = sort_column if isinstance(sort_column, tuple) else (sort_column,)
+    position = decode_cursor(cursor, tuple(column.type.python_type for column in sort_columns))
+    
+    if position and position[2] == 'prev':
+        # Walk backwards from the cursor, then restore newest-first order
+        rows = query.filter(_seek_filter(sort_columns, id_column, position, nulls_last)).order_by(
+            *_walk_order(sort_columns, id_column, False, nulls_last)
+        ).limit(per_page + 1).all()
+        has_more_before = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_prev, has_next = has_more_before, True
+    else:
+        if position:
+            query_page = query.filter(_seek_filter(sort_columns, id_column, position, nulls_last))
+        else:
+            query_page = query
+        rows = query_page.order_by(
+            *_walk_order(sort_columns, id_column, True, nulls_last)
+        ).limit(per_page + 1).all()
+        items = rows[:per_page]
+        has_prev, has_next = position is not None, len(rows) > per_page
+        
+    def position_of(row):
+        return [getattr(row, column.key) for column in sort_columns], getattr(row, id_column.key)
+        
+    next_cursor = prev_cursor = None
+    if items and has_next:
+        next_cursor = encode_cursor(*position_of(items[-1]), 'next')
+    if items and has_prev:
+        prev_cursor = encode_cursor(*position_of(items[0]), 'prev')
+        
+    total = None
+    total_is_estimate = False
+    if count_cap:
+        # Bounded count: stops scanning after count_cap + 1 rows
+        capped = query.order_by(None).limit(count_cap + 1).subquery()
+        total = db.session.query(db.func.count()).select_from(capped).scalar()
+        if total > count_cap:
+            total, total_is_estimate = count_cap, True
+            
+    return KeysetPage(
+        items,
+        per_page,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        total=total,
+        total_is_estimate=total_is_estimate
+    )
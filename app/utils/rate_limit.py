@@ -0,0 +1,184 @@
+"""SQLite storage backend for Flask-Limiter."""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Rate limit counters in a SQLite file, shared by every worker on the host.
+    
+    Registered for ``sqlite:///relative/path.db`` (``sqlite:////abs/path.db``
+    for absolute paths) storage URIs. Supports the fixed-window and
+    sliding-window-counter strategies; every update is a single UPSERT, so
+    concurrent workers never lose hits. Expired counters are compacted every
+    PRUNE_EVERY writes.
+    """
+    
+    STORAGE_SCHEME = ['sqlite']
+    PRUNE_EVERY = 500
+    
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        self.path = uri.split('://', 1)[1][1:]
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._ready = False
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+    
+    @property
+    def base_exceptions(self):
+        return (sqlite3.Error, OSError)
+    
+    @contextmanager
+    def _connect(self):
+        """Open an autocommit connection for one operation."""
+        if not self._ready:
+            self._create_schema()
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def _create_schema(self):
+        """
+        Create the database file and table on first use.
+        
+        Deferred from __init__ so an unwritable filesystem fails the first
+        hit, where RATELIMIT_IN_MEMORY_FALLBACK_ENABLED can take over, rather
+        than app creation.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                'key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)'
+            )
+        finally:
+            conn.close()
+        self._ready = True
+    
+    def incr(self, key, expiry, amount=1):
+        """Increment a counter, starting a new window if it has expired."""
+        now = time.time()
+        with self._connect() as conn:
+            count = conn.execute(
+                'INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET '
+                'count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END, '
+                'expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END '
+                'RETURNING count',
+                (key, amount, now + expiry, now, now)
+            ).fetchone()[0]
+            
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self._prune()
+        return count
+    
+    def decr(self, key, amount=1):
+        """Decrement a live counter, never below zero."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'UPDATE rate_limits SET count = MAX(count - ?, 0) '
+                'WHERE key = ? AND expires_at > ? RETURNING count',
+                (amount, key, time.time())
+            ).fetchone()
+        return row[0] if row else 0
+    
+    def get(self, key):
+        """Get the current count, or 0 if missing or expired."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?',
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else 0
+    
+    def get_expiry(self, key):
+        """Get the time a counter's window ends."""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?',
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else time.time()
+    
+    def check(self):
+        """Check that the database file is usable."""
+        try:
+            with self._connect() as conn:
+                conn.execute('SELECT 1')
+            return True
+        except (sqlite3.Error, OSError):
+            return False
+    
+    def reset(self):
+        """Remove every counter. Returns the number removed."""
+        with self._connect() as conn:
+            return conn.execute('DELETE FROM rate_limits').rowcount
+    
+    def clear(self, key):
+        """Remove one counter."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+    
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        """Record a hit if the weighted count of both windows stays within limit."""
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count, previous_ttl, current_count, _ = self._sliding_window_info(
+            previous_key, current_key, expiry, now
+        )
+        if int(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+            return False
+            
+        # The current window is kept for two periods so it can serve as the previous one
+        current_count = self.incr(current_key, 2 * expiry, amount=amount)
+        if int(previous_count * previous_ttl / expiry + current_count) > limit:
+            # Another worker won the race for the last slot
+            self.decr(current_key, amount)
+            return False
+        return True
+    
+    def get_sliding_window(self, key, expiry):
+        """Return (previous count, previous TTL, current count, current TTL)."""
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._sliding_window_info(previous_key, current_key, expiry, now)
+    
+    def clear_sliding_window(self, key, expiry):
+        """Remove both window counters of a sliding window limit."""
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+    
+    def _sliding_window_info(self, previous_key, current_key, expiry, now):
+        """Read both window counters with one query."""
+        with self._connect() as conn:
+            counts = dict(conn.execute(
+                'SELECT key, count FROM rate_limits WHERE key IN (?, ?) AND expires_at > ?',
+                (previous_key, current_key, now)
+            ).fetchall())
+        previous_count = counts.get(previous_key, 0)
+        current_count = counts.get(current_key, 0)
+        
+        # Share of the previous window still inside the sliding window
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+    
+    def _prune(self):
+        """Compact the table by dropping expired counters."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM rate_limits WHERE expires_at <= ?', (time.time(),))
@@ -128,6 +128,7 @@ Liên hệ: admin@karateclub.edu.vn''',
             post = Post(
                 title=post_data['title'],
                 content=post_data['content'],
+                excerpt=Post.build_excerpt(post_data['content']),
                 status=post_data['status'],
                 author=post_data['author'],
                 published_at=datetime.utcnow() if post_data['status'] == PostStatus.PUBLISHED else None
@@ -0,0 +1,26 @@
+"""Add rendered content cache columns to posts
+
+Revision ID: 007_add_post_content_cache
+Revises: 006_add_notifications
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_add_post_content_cache'
+down_revision = '006_add_notifications'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rendered HTML is filled lazily on the next save of each post
+    op.add_column('posts', sa.Column('content_html', sa.Text(), nullable=True))
+    op.add_column('posts', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    op.drop_column('posts', 'content_hash')
+    op.drop_column('posts', 'content_html')
@@ -0,0 +1,75 @@
+"""Add full-text search index for posts
+
+Revision ID: 008_add_post_search
+Revises: 007_add_post_content_cache
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.helpers import normalize_search_text
+
+# revision identifiers, used by Alembic.
+revision = '008_add_post_search'
+down_revision = '007_add_post_content_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Normalized (accent-stripped) title + content
+    op.add_column('posts', sa.Column('search_text', sa.Text(), nullable=True))
+    
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Expression must match SearchService.search exactly to be used
+        op.execute(
+            "CREATE INDEX ix_posts_search_text_fts ON posts "
+            "USING gin (to_tsvector('simple', coalesce(search_text, '')))"
+        )
+    elif dialect == 'sqlite':
+        op.execute('CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(search_text)')
+    
+    # Backfill existing posts (same text as Post.build_search_text)
+    bind = op.get_bind()
+    posts = sa.table(
+        'posts',
+        sa.column('id', sa.Integer),
+        sa.column('title', sa.String),
+        sa.column('content', sa.Text),
+        sa.column('search_text', sa.Text)
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(posts.c.id, posts.c.title, posts.c.content)
+            .where(posts.c.id > last_id)
+            .order_by(posts.c.id)
+            .limit(500)
+        ).fetchall()
+        if not rows:
+            break
+        values = [
+            {'post_id': row.id, 'body': normalize_search_text(f'{row.title or ""}\n{row.content or ""}')}
+            for row in rows
+        ]
+        bind.execute(
+            posts.update().where(posts.c.id == sa.bindparam('post_id')).values(search_text=sa.bindparam('body')),
+            values
+        )
+        if dialect == 'sqlite':
+            bind.execute(
+                sa.text('INSERT OR REPLACE INTO posts_fts(rowid, search_text) VALUES (:post_id, :body)'),
+                values
+            )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_posts_search_text_fts')
+    elif dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS posts_fts')
+    
+    op.drop_column('posts', 'search_text')
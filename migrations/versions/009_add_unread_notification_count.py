@@ -0,0 +1,30 @@
+"""Add denormalized unread notification counter to users
+
+Revision ID: 009_add_unread_notification_count
+Revises: 008_add_post_search
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_add_unread_notification_count'
+down_revision = '008_add_post_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('unread_notification_count', sa.Integer(), nullable=False, server_default='0'))
+    
+    # Backfill from existing notifications
+    op.execute(
+        'UPDATE users SET unread_notification_count = ('
+        'SELECT COUNT(*) FROM notification '
+        'WHERE notification.user_id = users.id AND notification.is_read = false)'
+    )
+
+
+def downgrade():
+    op.drop_column('users', 'unread_notification_count')
@@ -0,0 +1,35 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: 011_add_keyset_indexes
+Revises: 010_add_jobs
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011_add_keyset_indexes'
+down_revision = '010_add_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Public feeds seek on (published_at, id) within PUBLISHED posts
+    op.create_index('ix_posts_status_published_at_id', 'posts', ['status', 'published_at', 'id'], unique=False)
+    
+    # Admin lists seek on (created_at, id)
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_comments_created_at_id', 'comments', ['created_at', 'id'], unique=False)
+    
+    # Tag feeds look up posts by tag (primary key is post_id, tag_id)
+    op.create_index('ix_post_tags_tag_id_post_id', 'post_tags', ['tag_id', 'post_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_post_tags_tag_id_post_id', table_name='post_tags')
+    op.drop_index('ix_comments_created_at_id', table_name='comments')
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
+    op.drop_index('ix_posts_status_published_at_id', table_name='posts')
@@ -0,0 +1,30 @@
+"""Add maintained published post count to tags
+
+Revision ID: 012_add_tag_post_count
+Revises: 011_add_keyset_indexes
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012_add_tag_post_count'
+down_revision = '011_add_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('tags', sa.Column('published_post_count', sa.Integer(), nullable=False, server_default='0'))
+    
+    # Backfill from existing published posts
+    op.execute(
+        "UPDATE tags SET published_post_count = ("
+        "SELECT COUNT(*) FROM post_tags JOIN posts ON posts.id = post_tags.post_id "
+        "WHERE post_tags.tag_id = tags.id AND posts.status = 'PUBLISHED')"
+    )
+
+
+def downgrade():
+    op.drop_column('tags', 'published_post_count')
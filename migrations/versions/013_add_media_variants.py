@@ -0,0 +1,37 @@
+"""Add resized image variants table
+
+Revision ID: 013_add_media_variants
+Revises: 012_add_tag_post_count
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_add_media_variants'
+down_revision = '012_add_tag_post_count'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_variants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('media_id', sa.Integer(), nullable=False),
+        sa.Column('size', sa.String(length=20), nullable=False),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('file_path', sa.String(length=255), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=True),
+        sa.Column('width', sa.Integer(), nullable=False),
+        sa.Column('height', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['media_id'], ['media.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('media_id', 'size', 'format', name='uq_media_variants_media_size_format')
+    )
+    op.create_index(op.f('ix_media_variants_media_id'), 'media_variants', ['media_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_media_variants_media_id'), table_name='media_variants')
+    op.drop_table('media_variants')
@@ -0,0 +1,31 @@
+"""Add daily activity rollup table
+
+Revision ID: 015_add_daily_stats
+Revises: 014_add_upload_sessions
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '015_add_daily_stats'
+down_revision = '014_add_upload_sessions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('new_posts', sa.Integer(), nullable=False),
+        sa.Column('new_comments', sa.Integer(), nullable=False),
+        sa.Column('new_members', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('day')
+    )
+
+
+def downgrade():
+    op.drop_table('daily_stats')
@@ -0,0 +1,22 @@
+"""Add (role, status, belt) index on users for the promotion board
+
+Revision ID: 016_add_users_belt_index
+Revises: 015_add_daily_stats
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '016_add_users_belt_index'
+down_revision = '015_add_daily_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_role_status_belt', 'users', ['role', 'status', 'belt'])
+
+
+def downgrade():
+    op.drop_index('ix_users_role_status_belt', table_name='users')
@@ -0,0 +1,41 @@
+"""Add belt promotion history table
+
+Revision ID: 017_add_belt_promotions
+Revises: 016_add_users_belt_index
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '017_add_belt_promotions'
+down_revision = '016_add_users_belt_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'belt_promotions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('from_belt', sa.String(length=50), nullable=True),
+        sa.Column('to_belt', sa.String(length=50), nullable=False),
+        sa.Column('promoted_by_id', sa.Integer(), nullable=True),
+        sa.Column('promoted_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['promoted_by_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_belt_promotions_user_id_promoted_at',
+        'belt_promotions',
+        ['user_id', 'promoted_at'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_belt_promotions_user_id_promoted_at', table_name='belt_promotions')
+    op.drop_table('belt_promotions')
@@ -0,0 +1,27 @@
+"""Add (post_id, created_at, id) index for paginated comment threads
+
+Revision ID: 018_add_comments_post_index
+Revises: 017_add_belt_promotions
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '018_add_comments_post_index'
+down_revision = '017_add_belt_promotions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_comments_post_id_created_at_id',
+        'comments',
+        ['post_id', 'created_at', 'id'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_comments_post_id_created_at_id', table_name='comments')
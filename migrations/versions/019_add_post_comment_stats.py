@@ -0,0 +1,42 @@
+"""Add maintained comment count and last comment time to posts
+
+Revision ID: 019_add_post_comment_stats
+Revises: 018_add_comments_post_index
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '019_add_post_comment_stats'
+down_revision = '018_add_comments_post_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('posts', sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('posts', sa.Column('last_commented_at', sa.DateTime(), nullable=True))
+    
+    # Backfill from existing approved comments
+    op.execute(
+        "UPDATE posts SET "
+        "comment_count = (SELECT COUNT(*) FROM comments "
+        "WHERE comments.post_id = posts.id AND comments.is_approved), "
+        "last_commented_at = (SELECT MAX(comments.created_at) FROM comments "
+        "WHERE comments.post_id = posts.id AND comments.is_approved)"
+    )
+    
+    op.create_index(
+        'ix_posts_status_comment_count_id',
+        'posts',
+        ['status', 'comment_count', 'id'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_posts_status_comment_count_id', table_name='posts')
+    op.drop_column('posts', 'last_commented_at')
+    op.drop_column('posts', 'comment_count')
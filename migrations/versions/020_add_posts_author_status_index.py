@@ -0,0 +1,27 @@
+"""Add (author_id, status, created_at) index for per-member post stats
+
+Revision ID: 020_add_posts_author_status_index
+Revises: 019_add_post_comment_stats
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '020_add_posts_author_status_index'
+down_revision = '019_add_post_comment_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_posts_author_id_status_created_at',
+        'posts',
+        ['author_id', 'status', 'created_at'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_posts_author_id_status_created_at', table_name='posts')
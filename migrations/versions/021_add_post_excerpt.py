@@ -0,0 +1,51 @@
+"""Add stored plain-text excerpt to posts
+
+Revision ID: 021_add_post_excerpt
+Revises: 020_add_posts_author_status_index
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.helpers import markdown_to_text, truncate_text
+
+# revision identifiers, used by Alembic.
+revision = '021_add_post_excerpt'
+down_revision = '020_add_posts_author_status_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('posts', sa.Column('excerpt', sa.String(length=301), nullable=True))
+    
+    # Backfill existing posts (same text as Post.build_excerpt)
+    bind = op.get_bind()
+    posts = sa.table(
+        'posts',
+        sa.column('id', sa.Integer),
+        sa.column('content', sa.Text),
+        sa.column('excerpt', sa.String)
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(posts.c.id, posts.c.content)
+            .where(posts.c.id > last_id)
+            .order_by(posts.c.id)
+            .limit(200)
+        ).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            posts.update().where(posts.c.id == sa.bindparam('post_id')).values(excerpt=sa.bindparam('new_excerpt')),
+            [
+                {'post_id': row.id, 'new_excerpt': truncate_text(markdown_to_text(row.content), 300, suffix='…')}
+                for row in rows
+            ]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    op.drop_column('posts', 'excerpt')
@@ -0,0 +1,43 @@
+"""Index the most active feed on last comment time
+
+Revision ID: 022_add_posts_last_commented_index
+Revises: 021_add_post_excerpt
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '022_add_posts_last_commented_index'
+down_revision = '021_add_post_excerpt'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The feed now seeks on (last_commented_at, comment_count, id)
+    op.drop_index('ix_posts_status_comment_count_id', table_name='posts')
+    
+    if op.get_bind().dialect.name == 'postgresql':
+        # Match ORDER BY ... DESC NULLS LAST so the index also serves the sort
+        columns = [
+            'status',
+            sa.text('last_commented_at DESC NULLS LAST'),
+            sa.text('comment_count DESC'),
+            sa.text('id DESC')
+        ]
+    else:
+        # SQLite indexes cannot declare NULLS LAST; the plain index still serves the seek
+        columns = ['status', 'last_commented_at', 'comment_count', 'id']
+    op.create_index('ix_posts_status_last_commented_at', 'posts', columns, unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_posts_status_last_commented_at', table_name='posts')
+    op.create_index(
+        'ix_posts_status_comment_count_id',
+        'posts',
+        ['status', 'comment_count', 'id'],
+        unique=False
+    )